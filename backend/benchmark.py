@@ -0,0 +1,252 @@
+"""
+Backend micro-benchmarks.
+
+Runs route handlers in-process against the MongoDB configured in .env, so the
+numbers include real database round-trips but no HTTP overhead. Benchmarks that
+measure response serialization call the ASGI app directly instead.
+
+Usage:
+    python benchmark.py            # run every benchmark
+    python benchmark.py submit     # run selected benchmarks
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import numpy as np
+
+import server
+
+BENCH_USER = {
+    "id": "benchmark-user",
+    "email": "benchmark@example.com",
+    "name": "Benchmark",
+    "created_at": "1970-01-01T00:00:00+00:00"
+}
+
+def report(name, samples):
+    """Print mean/p50/p99 for a list of durations in seconds"""
+    ms = sorted(s * 1000 for s in samples)
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    print(f"{name:<40} n={len(ms):<5} mean={statistics.mean(ms):8.2f}ms "
+          f"p50={statistics.median(ms):8.2f}ms p99={p99:8.2f}ms")
+
+async def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+async def asgi_get(path, query=""):
+    """GET `path` through the full ASGI app (routing, validation, serialization); returns the body"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": [], "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80)
+    }
+    body = []
+    
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"GET {path} returned {message['status']}")
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+    
+    await server.app(scope, receive, send)
+    return b"".join(body)
+
+async def cleanup():
+    await server.db.users.delete_many({"email": BENCH_USER["email"]})
+    await server.db.progress.delete_many({"user_id": BENCH_USER["id"]})
+    await server.db.study_sessions.delete_many({"user_id": BENCH_USER["id"]})
+    await server.db.spaced_repetition.delete_many({"user_id": BENCH_USER["id"]})
+    server.due_queues.evict(BENCH_USER["id"])
+
+# ============ BENCHMARKS ============
+
+async def bench_submit(runs=20):
+    """/progress/submit latency against exam size"""
+    bank = await server.get_question_bank()
+    for size in (10, 30, 60, 90):
+        questions = bank.sample(size)
+        submission = server.ExamSubmit(
+            answers=[server.AnswerSubmit(question_id=q["id"], selected_answer="a") for q in questions],
+            mode="exam"
+        )
+        samples = await timed(lambda: server.submit_answers(submission, BENCH_USER), runs)
+        report(f"submit ({len(questions)} answers)", samples)
+
+async def bench_submit_concurrent(concurrency=(1, 8, 32), rounds=10, size=10):
+    """Throughput of concurrent /progress/submit calls from the same user"""
+    bank = await server.get_question_bank()
+    questions = bank.sample(size)
+    submission = server.ExamSubmit(
+        answers=[server.AnswerSubmit(question_id=q["id"], selected_answer="a") for q in questions],
+        mode="practice"
+    )
+    for workers in concurrency:
+        await cleanup()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(*(server.submit_answers(submission, BENCH_USER) for _ in range(workers)))
+        elapsed = time.perf_counter() - start
+        
+        # Every submit must be reflected in the counters - no lost updates
+        progress = await server.db.progress.find_one({"user_id": BENCH_USER["id"]})
+        expected = workers * rounds * len(questions)
+        lost = expected - progress["total_questions_answered"]
+        print(f"concurrent submit x{workers:<3} {workers * rounds / elapsed:8.1f} submits/s  lost updates: {lost}")
+
+async def bench_login(logins=16, probes=200):
+    """Login throughput, and latency of other requests while logins are in flight"""
+    password = "benchmark-password"
+    await cleanup()
+    await server.db.users.insert_one({**BENCH_USER, "password_hash": server.hash_password(password)})
+    credentials = server.UserLogin(email=BENCH_USER["email"], password=password)
+    
+    async def probe_loop(samples, stop):
+        while not stop.is_set():
+            start = time.perf_counter()
+            await server.get_practice_questions(count=10, current_user=BENCH_USER)
+            samples.append(time.perf_counter() - start)
+            await asyncio.sleep(0.001)
+    
+    # Baseline latency with no logins running
+    baseline = await timed(lambda: server.get_practice_questions(count=10, current_user=BENCH_USER), probes)
+    report("practice (idle)", baseline)
+    
+    samples, stop = [], asyncio.Event()
+    prober = asyncio.create_task(probe_loop(samples, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(server.login(credentials) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+    print(f"login x{logins:<3} {logins / elapsed:8.1f} logins/s "
+          f"(BCRYPT_ROUNDS={server.BCRYPT_ROUNDS}, BCRYPT_WORKERS={server.BCRYPT_WORKERS})")
+    report("practice (during logins)", samples)
+
+def synthetic_bank(size):
+    """An in-memory QuestionBank of `size` generated questions spread across the domains"""
+    bank = server.QuestionBank()
+    for i in range(size):
+        domain = server.DOMAINS[i % len(server.DOMAINS)]
+        question = {
+            "id": f"bench-{i}",
+            "domain": domain["id"],
+            "domain_name": domain["name"],
+            "question": f"Benchmark question {i}?",
+            "options": [{"id": o, "text": f"Option {o}"} for o in "abcd"],
+            "correct_answer": "a",
+            "explanation": "Benchmark explanation."
+        }
+        bank.questions.append(question)
+        bank.by_id[question["id"]] = question
+        bank.by_domain.setdefault(question["domain"], []).append(question)
+    bank.loaded = True
+    return bank
+
+async def bench_exam(runs=200):
+    """Exam assembly latency against bank size"""
+    for size in (1_000, 10_000, 100_000):
+        bank = synthetic_bank(size)
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            bank.build_exam()
+            samples.append(time.perf_counter() - start)
+        report(f"build_exam (bank of {size})", samples)
+
+async def bench_serialize(seconds=3.0):
+    """Requests/s for question routes with pre-encoded JSON (FAST_QUESTION_JSON) off and on"""
+    await server.get_question_bank()
+    server.app.dependency_overrides[server.get_current_user] = lambda: BENCH_USER
+    fast_path = server.FAST_QUESTION_JSON
+    routes = [
+        ("/api/questions/exam", ""),
+        ("/api/questions/exam", "lean=true"),
+        ("/api/questions/practice", "count=10"),
+        ("/api/questions/practice", "count=10&lean=true"),
+    ]
+    try:
+        for path, query in routes:
+            rates = {}
+            for enabled in (False, True):
+                server.FAST_QUESTION_JSON = enabled
+                requests, size = 0, 0
+                start = time.perf_counter()
+                while time.perf_counter() - start < seconds:
+                    size = len(await asgi_get(path, query))
+                    requests += 1
+                rates[enabled] = requests / (time.perf_counter() - start)
+            name = f"{path}?{query}" if query else path
+            print(f"{name:<44} off={rates[False]:8.1f} req/s  on={rates[True]:8.1f} req/s  "
+                  f"x{rates[True] / rates[False]:.2f}  ({size} bytes)")
+    finally:
+        server.FAST_QUESTION_JSON = fast_path
+        server.app.dependency_overrides.pop(server.get_current_user, None)
+
+async def bench_due(runs=50):
+    """/spaced-repetition/due latency for users at 0%, 50% and 100% bank coverage"""
+    bank = await server.get_question_bank()
+    ids = bank.ordered_ids
+    for coverage in (0.0, 0.5, 1.0):
+        await cleanup()
+        await server.db.progress.insert_one({"user_id": BENCH_USER["id"]})
+        # Far-future reviews: the cards count as seen but never come due
+        reviewed = ids[:int(len(ids) * coverage)]
+        if reviewed:
+            await server.db.spaced_repetition.insert_many([
+                {"user_id": BENCH_USER["id"], "question_id": qid, "ease_factor": 2.5,
+                 "interval": 30, "repetitions": 3, "next_review": "9999-12-31"}
+                for qid in reviewed
+            ])
+        await server.get_due_cards(limit=20, current_user=BENCH_USER)  # settle the cursor
+        samples = await timed(lambda: server.get_due_cards(limit=20, current_user=BENCH_USER), runs)
+        report(f"due cards ({coverage:.0%} coverage, {len(ids)} questions)", samples)
+
+async def bench_forecast(runs=20, deck=884, days=365):
+    """Full-deck, one-year review forecast (SM-2 equivalence is checked in tests/test_sm2.py)"""
+    rng = np.random.default_rng(0)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        server.forecast_reviews(
+            due_in=rng.integers(-5, 30, deck), repetitions=rng.integers(0, 6, deck),
+            ease_factor=rng.uniform(1.3, 3.0, deck), interval=rng.integers(1, 60, deck),
+            new_cards=0, days=days
+        )
+        samples.append(time.perf_counter() - start)
+    report(f"forecast ({deck} cards, {days} days)", samples)
+
+BENCHMARKS = {
+    "submit": bench_submit,
+    "submit_concurrent": bench_submit_concurrent,
+    "login": bench_login,
+    "exam": bench_exam,
+    "serialize": bench_serialize,
+    "due": bench_due,
+    "forecast": bench_forecast,
+}
+
+async def main(names):
+    try:
+        for name in names or BENCHMARKS:
+            if name not in BENCHMARKS:
+                print(f"Unknown benchmark: {name} (choose from {', '.join(BENCHMARKS)})")
+                continue
+            print(f"--- {name} ---")
+            await BENCHMARKS[name]()
+    finally:
+        await cleanup()
+        server.client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -1,32 +1,40 @@
-import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-import os
+"""
+Question bank inventory: counts per domain (integer and name-string encodings
+folded together), answer-position distribution, schema violations and duplicates.
+Same report as GET /api/admin/inventory.
 
-load_dotenv()
+Usage:
+    python count_questions.py
+"""
+import asyncio
 
-MONGO_URL = os.getenv("MONGO_URL")
-DB_NAME = os.getenv("DB_NAME")
+import server
 
 async def count_questions():
-    client = AsyncIOMotorClient(MONGO_URL)
-    db = client[DB_NAME]
-    total = await db.questions.count_documents({})
+    try:
+        inventory = await server.question_inventory()
+    finally:
+        server.client.close()
+    
+    print("Questions by domain:")
+    for domain, stats in inventory["by_domain"].items():
+        print(f"  {domain:>7}  {stats['name']:<40} {stats['count']}")
+    
+    print("\nCorrect answer positions:")
+    for answer, count in inventory["answer_positions"].items():
+        print(f"  {answer}: {count}")
     
-    # Count by domain
-    domains = [
-        "General Security Concepts",
-        "Threats, Vulnerabilities & Mitigations",
-        "Security Architecture",
-        "Security Operations",
-        "Security Program Management"
-    ]
+    print("\nSchema violations:")
+    for problem, count in inventory["schema_violations"].items():
+        print(f"  {problem}: {count}")
+    if not inventory["schema_violations"]:
+        print("  none")
     
-    for domain in domains:
-        count = await db.questions.count_documents({"domain": domain})
-        print(f"{domain}: {count}")
+    print(f"\nDuplicate questions: {len(inventory['duplicates'])}")
+    for duplicate in inventory["duplicates"][:20]:
+        print(f"  x{duplicate['count']}  {duplicate['question'][:80]}")
     
-    print(f"\nTotal questions in database: {total}")
-    client.close()
+    print(f"\nTotal questions in database: {inventory['total']}")
 
-asyncio.run(count_questions())
+if __name__ == "__main__":
+    asyncio.run(count_questions())
@@ -0,0 +1,161 @@
+"""
+Question bank loader.
+
+Normalizes every seed source to the server's Question schema (integer domain,
+QuestionOption objects, option-id correct_answer, id) and bulk-upserts it in
+chunks, deduplicated by the fingerprint of each question's normalized text.
+Existing documents with the same fingerprint are kept; malformed ones written by
+the old per-question seed scripts are replaced by their normalized form.
+
+Usage:
+    python load_questions.py                    # load every source
+    python load_questions.py expanded final     # load selected sources
+    python load_questions.py --dry-run          # report without writing
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from pydantic import ValidationError
+from pymongo import ReplaceOne, UpdateOne
+
+import server
+import seed_questions
+import seed_questions_expanded
+import seed_questions_final
+import seed_questions_milestone
+
+CHUNK_SIZE = 500
+
+SOURCES = {
+    "server": server.get_seed_questions,
+    "base": lambda: seed_questions.questions,
+    "expanded": lambda: seed_questions_expanded.additional_questions,
+    "final": lambda: seed_questions_final.final_questions,
+    "milestone": lambda: seed_questions_milestone.milestone_questions,
+}
+
+DOMAIN_IDS = {name.lower(): domain for domain, name in server.DOMAIN_NAMES.items()}
+
+def normalize_question(raw: dict) -> dict:
+    """Convert a seed record to a server Question document; raises ValueError if impossible"""
+    domain = raw.get("domain")
+    if isinstance(domain, str):
+        domain = DOMAIN_IDS.get(domain.strip().lower(), int(domain) if domain.isdigit() else None)
+    if domain not in server.DOMAIN_NAMES:
+        raise ValueError(f"unknown domain {raw.get('domain')!r}")
+
+    options = []
+    correct_answer = raw.get("correct_answer")
+    for i, option in enumerate(raw.get("options") or []):
+        if isinstance(option, dict):
+            options.append({"id": option["id"], "text": option["text"]})
+            continue
+        option_id = chr(ord("a") + i)
+        # Plain-string options store the correct answer as the option text
+        if option == raw.get("correct_answer"):
+            correct_answer = option_id
+        options.append({"id": option_id, "text": option})
+
+    fingerprint = server.question_fingerprint(raw["question"])
+    question = {
+        "id": raw.get("id") or str(uuid.uuid5(uuid.NAMESPACE_URL, f"question:{fingerprint}")),
+        "domain": domain,
+        "domain_name": server.DOMAIN_NAMES[domain],
+        "question": raw["question"],
+        "options": options,
+        "correct_answer": correct_answer,
+        "explanation": raw.get("explanation") or ""
+    }
+    try:
+        question = server.Question.model_validate(question).model_dump()
+    except ValidationError as e:
+        raise ValueError(e.errors(include_url=False)[0]["msg"])
+    if question["correct_answer"] not in {o["id"] for o in question["options"]}:
+        raise ValueError("correct_answer does not match any option")
+    question["fingerprint"] = fingerprint
+    return question
+
+async def existing_fingerprints() -> dict:
+    """Map fingerprint -> (_id, is_valid) for every question already in the database"""
+    existing = {}
+    async for doc in server.db.questions.find({}):
+        try:
+            server.Question.model_validate(doc)
+            valid = True
+        except ValidationError:
+            valid = False
+        fingerprint = doc.get("fingerprint") or server.question_fingerprint(doc.get("question", ""))
+        existing.setdefault(fingerprint, (doc["_id"], valid))
+    return existing
+
+async def load_source(name: str, existing: dict, seen: set, dry_run: bool) -> dict:
+    start = time.perf_counter()
+    stats = {"records": 0, "inserted": 0, "repaired": 0, "duplicates": 0, "rejected": 0}
+    ops = []
+
+    async def flush():
+        if not dry_run:
+            stats["duplicates"] += await server.write_ignoring_duplicates(server.db.questions, ops)
+        ops.clear()
+
+    for raw in SOURCES[name]():
+        stats["records"] += 1
+        try:
+            question = normalize_question(raw)
+        except (ValueError, KeyError) as e:
+            stats["rejected"] += 1
+            print(f"  rejected: {raw.get('question', '')[:60]!r}: {e}")
+            continue
+
+        fingerprint = question["fingerprint"]
+        if fingerprint in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(fingerprint)
+
+        current = existing.get(fingerprint)
+        if current is None:
+            ops.append(UpdateOne({"fingerprint": fingerprint}, {"$setOnInsert": question}, upsert=True))
+            stats["inserted"] += 1
+        elif not current[1]:
+            ops.append(ReplaceOne({"_id": current[0]}, question))
+            stats["repaired"] += 1
+        else:
+            stats["duplicates"] += 1
+        if len(ops) >= CHUNK_SIZE:
+            await flush()
+    await flush()
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load seed questions into MongoDB")
+    parser.add_argument("sources", nargs="*", help=f"sources to load: {', '.join(SOURCES)} (default: all)")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.sources if name not in SOURCES]
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(unknown)}")
+
+    try:
+        existing = await existing_fingerprints()
+        seen = set()
+        written = 0
+        for name in args.sources or SOURCES:
+            stats = await load_source(name, existing, seen, args.dry_run)
+            written += stats["inserted"] + stats["repaired"]
+            print(f"{name:<10} records={stats['records']:<5} inserted={stats['inserted']:<5} "
+                  f"repaired={stats['repaired']:<5} duplicates={stats['duplicates']:<5} "
+                  f"rejected={stats['rejected']:<3} {stats['seconds']:.3f}s")
+        if args.dry_run:
+            print("Dry run - nothing was written")
+        elif written:
+            print(f"Question bank version {await server.bump_bank_version()}")
+    finally:
+        server.client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,16 +1,7 @@
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-
-MONGO_URL = os.getenv("MONGO_URL")
-DB_NAME = os.getenv("DB_NAME")
-
-client = AsyncIOMotorClient(MONGO_URL)
-db = client[DB_NAME]
 
+# Question data for the "base" source of load_questions.py, which normalizes it to
+# the server schema and bulk-loads it without duplicates.
 questions = [
     # Domain 1: General Security Concepts (~120 questions)
     {"domain": "General Security Concepts", "question": "What is the primary goal of confidentiality in information security?", "options": ["Prevent unauthorized access to data", "Ensure data availability", "Verify data integrity", "Track data changes"], "correct_answer": "Prevent unauthorized access to data"},
@@ -392,18 +383,6 @@ questions = [
     {"domain": "Security Program Management", "question": "What is risk transfer?", "options": ["Shift risk to third party", "Keep risk", "Ignore risk", "Share internally"], "correct_answer": "Shift risk to third party"},
 ]
 
-async def seed_questions():
-    inserted_count = 0
-    for q in questions:
-        # Check if question already exists (case-insensitive)
-        existing = await db.questions.find_one({"question": {"$regex": f"^{q['question']}$", "$options": "i"}})
-        if not existing:
-            await db.questions.insert_one(q)
-            inserted_count += 1
-        else:
-            print(f"Skipped duplicate: {q['question']}")
-    
-    print(f"Inserted {inserted_count} new questions. Skipped {len(questions) - inserted_count} duplicates.")
-
 if __name__ == "__main__":
-    asyncio.run(seed_questions())
\ No newline at end of file
+    from load_questions import main
+    asyncio.run(main(["base"]))
@@ -1,16 +1,7 @@
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-
-MONGO_URL = os.getenv("MONGO_URL")
-DB_NAME = os.getenv("DB_NAME")
-
-client = AsyncIOMotorClient(MONGO_URL)
-db = client[DB_NAME]
 
+# Question data for the "expanded" source of load_questions.py, which normalizes it to
+# the server schema and bulk-loads it without duplicates.
 additional_questions = [
     # Additional Domain 1: General Security Concepts (25+ more)
     {"domain": "General Security Concepts", "question": "What is the AAA model?", "options": ["Authentication, Authorization, Accounting", "Access, Audit, Approval", "Authentication, Allocation, Auditing", "Authorization, Audit, Alerting"], "correct_answer": "Authentication, Authorization, Accounting"},
@@ -155,18 +146,6 @@ additional_questions = [
     {"domain": "Security Program Management", "question": "What is KRI?", "options": ["Key Risk Indicator", "Key Response Index", "Key Reporting Index", "Key Result Indicator"], "correct_answer": "Key Risk Indicator"},
 ]
 
-async def seed_questions():
-    inserted_count = 0
-    for q in additional_questions:
-        # Check if question already exists (case-insensitive)
-        existing = await db.questions.find_one({"question": {"$regex": f"^{q['question']}$", "$options": "i"}})
-        if not existing:
-            await db.questions.insert_one(q)
-            inserted_count += 1
-        else:
-            print(f"Skipped duplicate: {q['question']}")
-    
-    print(f"Inserted {inserted_count} new questions. Skipped {len(additional_questions) - inserted_count} duplicates.")
-
 if __name__ == "__main__":
-    asyncio.run(seed_questions())
+    from load_questions import main
+    asyncio.run(main(["expanded"]))
@@ -1,16 +1,7 @@
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-
-MONGO_URL = os.getenv("MONGO_URL")
-DB_NAME = os.getenv("DB_NAME")
-
-client = AsyncIOMotorClient(MONGO_URL)
-db = client[DB_NAME]
 
+# Question data for the "final" source of load_questions.py, which normalizes it to
+# the server schema and bulk-loads it without duplicates.
 final_questions = [
     # Final additions Domain 1: General Security Concepts (10+)
     {"domain": "General Security Concepts", "question": "What is control testing?", "options": ["Verify control effectiveness", "No testing", "Skip testing", "Assumed working"], "correct_answer": "Verify control effectiveness"},
@@ -111,18 +102,6 @@ final_questions = [
     {"domain": "Security Program Management", "question": "What is risk communication?", "options": ["Share risk information", "Risk analysis", "Risk management", "Risk acceptance"], "correct_answer": "Share risk information"},
 ]
 
-async def seed_questions():
-    inserted_count = 0
-    for q in final_questions:
-        # Check if question already exists (case-insensitive)
-        existing = await db.questions.find_one({"question": {"$regex": f"^{q['question']}$", "$options": "i"}})
-        if not existing:
-            await db.questions.insert_one(q)
-            inserted_count += 1
-        else:
-            print(f"Skipped duplicate: {q['question']}")
-    
-    print(f"Inserted {inserted_count} new questions. Skipped {len(final_questions) - inserted_count} duplicates.")
-
 if __name__ == "__main__":
-    asyncio.run(seed_questions())
+    from load_questions import main
+    asyncio.run(main(["final"]))
@@ -1,17 +1,37 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, DeleteOne, IndexModel, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
 import os
+import asyncio
 import logging
+import random
+import re
+import json
+import gzip
+import hashlib
+import bisect
+import heapq
+import time
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel, Field, EmailStr, ValidationError
+from typing import AsyncIterator, List, Optional, Union
+from collections import Counter, OrderedDict, deque
 import uuid
 from datetime import datetime, timezone, timedelta
 import bcrypt
 import jwt
+import numpy as np
+
+try:
+    import brotli
+except ImportError:  # Optional: responses fall back to gzip
+    brotli = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -26,6 +46,42 @@ JWT_SECRET = os.environ.get('JWT_SECRET')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# Password hashing configuration
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS', '2'))
+
+# User cache configuration
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '60'))
+
+# Exam pool configuration
+EXAM_POOL_SIZE = int(os.environ.get('EXAM_POOL_SIZE', '16'))
+EXAM_POOL_REFILL_INTERVAL = float(os.environ.get('EXAM_POOL_REFILL_INTERVAL', '0.01'))
+EXAM_POOL_FLUSH_ON_RELOAD = os.environ.get('EXAM_POOL_FLUSH_ON_RELOAD', 'true').lower() == 'true'
+
+# Serve question lists by splicing JSON pre-encoded at bank load instead of per-request validation
+FAST_QUESTION_JSON = os.environ.get('FAST_QUESTION_JSON', 'true').lower() == 'true'
+
+# Response compression (gzip only if the `brotli` package is not installed)
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_CACHE_SIZE = int(os.environ.get('COMPRESSION_CACHE_SIZE', '256'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+# Due queue configuration
+DUE_QUEUE_MAX_CARDS = int(os.environ.get('DUE_QUEUE_MAX_CARDS', '200000'))
+DUE_QUEUE_TTL = float(os.environ.get('DUE_QUEUE_TTL', '300'))
+
+# Cross-worker cache invalidation (0 disables; caches then rely on their TTLs)
+INVALIDATION_POLL_INTERVAL = float(os.environ.get('INVALIDATION_POLL_INTERVAL', '2'))
+INVALIDATION_CHANGE_STREAM = os.environ.get('INVALIDATION_CHANGE_STREAM', 'true').lower() == 'true'
+# Per-user events cost a write on every review; they only matter when other workers
+# or instances hold their own caches. uvicorn reads WEB_CONCURRENCY as its worker count.
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))
+INVALIDATION_USER_EVENTS = os.environ.get(
+    'INVALIDATION_USER_EVENTS', 'true' if WEB_CONCURRENCY > 1 else 'false'
+).lower() == 'true'
+
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
@@ -81,6 +137,26 @@ class Question(BaseModel):
     correct_answer: str
     explanation: str
 
+class QuestionPublic(BaseModel):
+    # Exam/practice delivery without the answer key; see /questions/explanations
+    id: str
+    domain: int
+    domain_name: str
+    question: str
+    options: List[QuestionOption]
+
+class ExplanationRequest(BaseModel):
+    question_ids: List[str]
+
+class QuestionImport(BaseModel):
+    id: Optional[str] = None  # Ignored when the question matches an existing one
+    domain: int
+    domain_name: str
+    question: str
+    options: List[QuestionOption]
+    correct_answer: str
+    explanation: str
+
 class AnswerSubmit(BaseModel):
     question_id: str
     selected_answer: str
@@ -113,21 +189,102 @@ class ReviewSubmit(BaseModel):
     question_id: str
     quality: int  # 0-5 rating (0-2 = fail, 3-5 = pass)
 
+class ReviewBatchItem(BaseModel):
+    question_id: str
+    quality: int  # 0-5 rating (0-2 = fail, 3-5 = pass)
+    reviewed_at: Optional[str] = None  # ISO timestamp; defaults to now
+
+class ReviewBatchSubmit(BaseModel):
+    reviews: List[ReviewBatchItem]
+
 class SpacedRepetitionStats(BaseModel):
     total_cards: int
     due_today: int
     mastered: int  # Cards with interval > 21 days
     learning: int  # Cards with interval <= 21 days
     new_cards: int  # Cards never reviewed
+    by_domain: dict = {}  # Same counts per domain
+
+# ============ CACHES ============
+
+class TTLCache:
+    """Size-capped LRU cache whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def evict(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+# User records by id, consulted by get_current_user on every authenticated request.
+# Anything that modifies a user document must call user_cache.evict(user_id) and
+# invalidation_bus.publish(USER_EVENT, user_id) so other workers drop their copy too.
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
 
 # ============ AUTH HELPERS ============
 
+# bcrypt is CPU-bound; run it off the event loop on a small bounded pool so a burst
+# of logins can't starve other requests (the pool size caps concurrent hashes).
+password_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
 
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+def password_needs_rehash(hashed: str) -> bool:
+    """True if the hash was made with a different work factor than BCRYPT_ROUNDS"""
+    try:
+        return int(hashed.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, verify_password, password, hashed)
+
 def create_token(user_id: str) -> str:
     payload = {
         "user_id": user_id,
@@ -142,9 +299,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         user_id = payload.get("user_id")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
+            if not user:
+                raise HTTPException(status_code=401, detail="User not found")
+            user_cache.set(user_id, user)
         return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
@@ -164,10 +324,14 @@ async def register(user_data: UserCreate):
         "id": user_id,
         "email": user_data.email,
         "name": user_data.name,
-        "password_hash": hash_password(user_data.password),
+        "password_hash": await hash_password_async(user_data.password),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.users.insert_one(user)
+    try:
+        await db.users.insert_one(user)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration for the same email (email_unique)
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     # Initialize progress
     await db.progress.insert_one({
@@ -177,8 +341,7 @@ async def register(user_data: UserCreate):
         "domain_stats": {str(i): {"answered": 0, "correct": 0} for i in range(1, 6)},
         "current_streak": 0,
         "longest_streak": 0,
-        "last_study_date": None,
-        "history": []
+        "last_study_date": None
     })
     
     token = create_token(user_id)
@@ -190,9 +353,18 @@ async def register(user_data: UserCreate):
 @api_router.post("/auth/login", response_model=TokenResponse)
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user or not verify_password(credentials.password, user["password_hash"]):
+    if not user or not await verify_password_async(credentials.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    # Transparently upgrade hashes made with an old work factor
+    if password_needs_rehash(user["password_hash"]):
+        await db.users.update_one(
+            {"id": user["id"]},
+            {"$set": {"password_hash": await hash_password_async(credentials.password)}}
+        )
+        user_cache.evict(user["id"])
+        await invalidation_bus.publish(USER_EVENT, user["id"])
+    
     token = create_token(user["id"])
     return TokenResponse(
         token=token,
@@ -208,54 +380,486 @@ async def get_me(current_user: dict = Depends(get_current_user)):
         created_at=current_user["created_at"]
     )
 
+# ============ EXAM BLUEPRINT ============
+
+# SY0-701 domains and their official exam weights (percent). Single source of truth
+# for /domains, domain names and exam assembly.
+DOMAINS = [
+    {"id": 1, "name": "General Security Concepts", "weight": 12},
+    {"id": 2, "name": "Threats, Vulnerabilities & Mitigations", "weight": 22},
+    {"id": 3, "name": "Security Architecture", "weight": 18},
+    {"id": 4, "name": "Security Operations", "weight": 28},
+    {"id": 5, "name": "Security Program Management", "weight": 20}
+]
+DOMAIN_NAMES = {d["id"]: d["name"] for d in DOMAINS}
+EXAM_QUESTION_COUNT = 90
+
+def exam_blueprint(total: int = EXAM_QUESTION_COUNT) -> dict:
+    """
+    Apportion `total` questions across domains by weight (largest remainder),
+    e.g. 90 -> {1: 11, 2: 20, 3: 16, 4: 25, 5: 18}
+    """
+    total_weight = sum(d["weight"] for d in DOMAINS)
+    quotas = {d["id"]: total * d["weight"] / total_weight for d in DOMAINS}
+    counts = {domain: int(quota) for domain, quota in quotas.items()}
+    by_remainder = sorted(quotas, key=lambda domain: quotas[domain] - counts[domain], reverse=True)
+    for domain in by_remainder[:total - sum(counts.values())]:
+        counts[domain] += 1
+    return counts
+
+EXAM_BLUEPRINT = exam_blueprint()
+
+# ============ QUESTION FINGERPRINTS ============
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+CONTENT_FIELDS = ("domain", "domain_name", "question", "options", "correct_answer", "explanation")
+
+def normalize_question_text(text: str) -> str:
+    """Case-, whitespace- and punctuation-insensitive form of a question's text"""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text.lower())).strip()
+
+def question_fingerprint(text: str) -> str:
+    """Identity of a question: hash of its normalized text"""
+    return hashlib.sha1(normalize_question_text(text).encode("utf-8")).hexdigest()
+
+def with_fingerprint(question: dict) -> dict:
+    """Store the question's fingerprint on the document (unique-indexed in the questions collection)"""
+    if isinstance(question.get("question"), str):
+        question["fingerprint"] = question_fingerprint(question["question"])
+    return question
+
+DUPLICATE_KEY = 11000
+
+async def write_ignoring_duplicates(collection, ops: list, rejected: Optional[list] = None) -> int:
+    """
+    Unordered bulk write that tolerates duplicate-fingerprint rejections.
+    Returns how many operations were rejected as duplicates (their positions in `ops`
+    are appended to `rejected` if given); other errors are raised.
+    """
+    if not ops:
+        return 0
+    try:
+        await collection.bulk_write(ops, ordered=False)
+        return 0
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error["code"] != DUPLICATE_KEY for error in errors):
+            raise
+        if rejected is not None:
+            rejected.extend(error["index"] for error in errors)
+        return len(errors)
+
+def question_content_hash(question: dict) -> str:
+    """Hash of everything but the id, to detect edited questions"""
+    content = {field: question.get(field) for field in CONTENT_FIELDS}
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+# ============ QUESTION BANK CACHE ============
+
+class QuestionBank:
+    """
+    Process-wide in-memory copy of the question bank.
+    The bank only changes through the admin/seed endpoints, which call
+    publish_bank_change() after writing, so read-only endpoints can sample from
+    memory instead of MongoDB. `version` counts local reloads; `revision` is the
+    persisted bank version the loaded questions correspond to.
+    Returned question dicts are shared - callers must copy before mutating.
+    Each valid question is also pre-encoded to JSON (full and public forms) so
+    question lists can be served without per-request validation.
+    """
+
+    def __init__(self):
+        self.questions: List[dict] = []
+        self.by_id: dict = {}
+        self.by_domain: dict = {}
+        self.ordered_ids: List[str] = []
+        self.encoded: dict = {}
+        self.encoded_public: dict = {}
+        self.loaded = False
+        self.version = 0
+        self.revision = 0
+        self._lock = asyncio.Lock()
+
+    async def reload(self):
+        # Read the revision first: a write racing this load can only make the
+        # questions newer than the revision, never older
+        revision = await read_bank_version()
+        questions = await db.questions.find({}, {"_id": 0, "fingerprint": 0}).to_list(None)
+        # Id order makes listings and seeded samples identical across processes
+        questions.sort(key=lambda q: str(q.get("id", "")))
+        by_id = {}
+        by_domain = {}
+        for q in questions:
+            if "id" in q:
+                by_id[q["id"]] = q
+            by_domain.setdefault(q.get("domain"), []).append(q)
+        encoded = {}
+        encoded_public = {}
+        for question_id, q in by_id.items():
+            try:
+                encoded[question_id] = Question.model_validate(q).model_dump_json().encode()
+                encoded_public[question_id] = QuestionPublic.model_validate(q).model_dump_json().encode()
+            except ValidationError:
+                # No fragment: responses containing it take the validated path
+                pass
+        # Swap in one step so concurrent readers never see a partial bank
+        self.questions, self.by_id, self.by_domain = questions, by_id, by_domain
+        self.encoded, self.encoded_public = encoded, encoded_public
+        self.ordered_ids = sorted(by_id)
+        self.revision = revision
+        self.loaded = True
+        self.version += 1
+        logger.info(f"Question bank loaded (revision {revision}, {len(questions)} questions, "
+                    f"{len(questions) - len(encoded)} not pre-encoded)")
+
+    async def ensure_loaded(self):
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self.reload()
+
+    def pool(self, domain: Optional[int] = None) -> List[dict]:
+        if domain:
+            return self.by_domain.get(domain, [])
+        return self.questions
+
+    def sample(self, count: int, domain: Optional[int] = None, rng: Optional[random.Random] = None) -> List[dict]:
+        pool = self.pool(domain)
+        return (rng or random).sample(pool, max(0, min(count, len(pool))))
+
+    def get(self, question_id: str) -> Optional[dict]:
+        return self.by_id.get(question_id)
+
+    def ids_after(self, cursor: str, count: int) -> List[str]:
+        """Up to `count` question ids following `cursor` in the stable (sorted id) ordering"""
+        start = bisect.bisect_right(self.ordered_ids, cursor)
+        return self.ordered_ids[start:start + count]
+
+    def can_build_exam(self, blueprint: dict = EXAM_BLUEPRINT) -> bool:
+        """Whether every domain has enough questions for a full-length exam"""
+        return self.loaded and all(len(self.pool(domain)) >= count for domain, count in blueprint.items())
+
+    def build_exam(self, blueprint: dict = EXAM_BLUEPRINT) -> List[dict]:
+        """Assemble a shuffled, domain-weighted exam entirely from memory"""
+        exam = []
+        for domain, count in blueprint.items():
+            exam.extend(self.sample(count, domain))
+        random.shuffle(exam)
+        return exam
+
+BANK_VERSION_ID = "questions"
+
+async def read_bank_version() -> int:
+    doc = await db.versions.find_one({"_id": BANK_VERSION_ID})
+    return doc["version"] if doc else 0
+
+async def bump_bank_version() -> int:
+    """Atomically increment the persisted bank version; every question write must call this"""
+    doc = await db.versions.find_one_and_update(
+        {"_id": BANK_VERSION_ID},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return doc["version"]
+
+question_bank = QuestionBank()
+
+async def publish_bank_change():
+    """Record a question bank write: bump the persisted version, then reload this process's bank"""
+    await bump_bank_version()
+    await question_bank.reload()
+
+async def get_question_bank() -> QuestionBank:
+    await question_bank.ensure_loaded()
+    return question_bank
+
+async def get_answer_key(question_ids: List[str]) -> dict:
+    """
+    Map question id -> question for grading.
+    Served from the bank cache; ids the cache doesn't know about (e.g. written by
+    another process) are fetched with a single batched $in query.
+    """
+    bank = await get_question_bank()
+    answer_key = {}
+    missing = []
+    for question_id in set(question_ids):
+        question = bank.get(question_id)
+        if question:
+            answer_key[question_id] = question
+        else:
+            missing.append(question_id)
+    if missing:
+        async for question in db.questions.find({"id": {"$in": missing}}, {"_id": 0}):
+            answer_key[question["id"]] = question
+    return answer_key
+
+# ============ EXAM POOL ============
+
+class ExamPool:
+    """
+    Bounded pool of pre-assembled exams so /questions/exam can pop one in O(1).
+    A background task refills the pool after each pop, but only while the bank can
+    supply full-length exams; otherwise pop() builds on demand. Exams are tagged with the
+    bank version they were built from; when the bank reloads, stale exams are
+    dropped (EXAM_POOL_FLUSH_ON_RELOAD) or left to drain.
+    """
+
+    def __init__(self, bank: QuestionBank, size: int, refill_interval: float, flush_on_reload: bool):
+        self.bank = bank
+        self.size = size
+        self.refill_interval = refill_interval
+        self.flush_on_reload = flush_on_reload
+        self.hits = 0
+        self.misses = 0
+        self._exams = deque()
+        self._version = bank.version
+        self._wanted = asyncio.Event()
+        self._task = None
+
+    def _check_version(self):
+        if self._version != self.bank.version:
+            if self.flush_on_reload:
+                self._exams.clear()
+            self._version = self.bank.version
+            self._wanted.set()
+
+    def pop(self) -> List[dict]:
+        self._check_version()
+        self._wanted.set()
+        if self._exams:
+            self.hits += 1
+            return self._exams.popleft()
+        self.misses += 1
+        return self.bank.build_exam()
+
+    async def _refill_forever(self):
+        while True:
+            await self._wanted.wait()
+            self._wanted.clear()
+            self._check_version()
+            # Never pool short (or, before the bank loads, empty) exams
+            while len(self._exams) < self.size and self.bank.can_build_exam():
+                self._exams.append(self.bank.build_exam())
+                # Yield between builds so refilling never monopolizes the loop
+                await asyncio.sleep(self.refill_interval)
+
+    def start(self):
+        if self.size > 0 and self._task is None:
+            self._task = asyncio.create_task(self._refill_forever())
+            self._wanted.set()
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"depth": len(self._exams), "size": self.size, "hits": self.hits, "misses": self.misses}
+
+exam_pool = ExamPool(question_bank, EXAM_POOL_SIZE, EXAM_POOL_REFILL_INTERVAL, EXAM_POOL_FLUSH_ON_RELOAD)
+
 # ============ QUESTIONS ROUTES ============
 
+class RawJSONResponse(Response):
+    media_type = "application/json"
+
+PUBLIC_QUESTION_FIELDS = ("id", "domain", "domain_name", "question", "options")
+MAX_EXPLANATION_BATCH = 500
+
+def public_questions(questions: List[dict]) -> List[dict]:
+    """Strip correct_answer and explanation so answers never reach the client before grading"""
+    return [{field: q[field] for field in PUBLIC_QUESTION_FIELDS} for q in questions]
+
+def question_response(bank: QuestionBank, questions: List[dict], lean: bool = False):
+    """
+    Splice the bank's pre-encoded fragments into one JSON array.
+    Falls back to the response_model path when the fast path is off or a question
+    has no fragment (malformed, or from a bank version that has since been replaced).
+    """
+    if FAST_QUESTION_JSON:
+        fragments = bank.encoded_public if lean else bank.encoded
+        try:
+            return RawJSONResponse(b"[" + b",".join(fragments[q["id"]] for q in questions) + b"]")
+        except KeyError:
+            pass
+    return public_questions(questions) if lean else questions
+
+def bank_etag(bank: QuestionBank) -> str:
+    return f'W/"bank-{bank.revision}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak If-None-Match comparison: W/ prefixes are ignored"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+def tag_response(result, response: Response, etag: str):
+    """Attach an ETag whether the route returns a Response or data for its response_model"""
+    (result if isinstance(result, Response) else response).headers["ETag"] = etag
+    return result
+
 @api_router.get("/questions", response_model=List[Question])
-async def get_questions(domain: Optional[int] = None, limit: int = 50, current_user: dict = Depends(get_current_user)):
-    query = {}
-    if domain:
-        query["domain"] = domain
-    questions = await db.questions.find(query, {"_id": 0}).limit(limit).to_list(limit)
-    return questions
+async def get_questions(request: Request, response: Response, domain: Optional[int] = None, limit: int = 50, current_user: dict = Depends(get_current_user)):
+    bank = await get_question_bank()
+    etag = bank_etag(bank)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return tag_response(question_response(bank, bank.pool(domain)[:max(0, limit)]), response, etag)
 
-@api_router.get("/questions/practice", response_model=List[Question])
-async def get_practice_questions(domain: Optional[int] = None, count: int = 10, current_user: dict = Depends(get_current_user)):
-    pipeline = []
-    if domain:
-        pipeline.append({"$match": {"domain": domain}})
-    pipeline.append({"$sample": {"size": count}})
-    pipeline.append({"$project": {"_id": 0}})
-    questions = await db.questions.aggregate(pipeline).to_list(count)
-    return questions
+@api_router.get("/questions/practice", response_model=List[Union[Question, QuestionPublic]])
+async def get_practice_questions(domain: Optional[int] = None, count: int = 10, lean: bool = False, current_user: dict = Depends(get_current_user)):
+    bank = await get_question_bank()
+    return question_response(bank, bank.sample(count, domain), lean)
 
-@api_router.get("/questions/exam", response_model=List[Question])
-async def get_exam_questions(current_user: dict = Depends(get_current_user)):
+@api_router.get("/questions/exam", response_model=List[Union[Question, QuestionPublic]])
+async def get_exam_questions(lean: bool = False, current_user: dict = Depends(get_current_user)):
     # SY0-701 has ~90 questions, weighted by domain
-    domain_weights = {1: 11, 2: 20, 3: 16, 4: 25, 5: 18}
-    all_questions = []
-    
-    for domain, count in domain_weights.items():
-        pipeline = [
-            {"$match": {"domain": domain}},
-            {"$sample": {"size": count}},
-            {"$project": {"_id": 0}}
-        ]
-        questions = await db.questions.aggregate(pipeline).to_list(count)
-        all_questions.extend(questions)
-    
-    import random
-    random.shuffle(all_questions)
-    return all_questions
+    bank = await get_question_bank()
+    return question_response(bank, exam_pool.pop(), lean)
+
+@api_router.post("/questions/explanations")
+async def get_explanations(request: ExplanationRequest, current_user: dict = Depends(get_current_user)):
+    """Answer key for lean-delivered questions, fetched in one batch once the user has answered"""
+    if len(request.question_ids) > MAX_EXPLANATION_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_EXPLANATION_BATCH} questions per request")
+    answer_key = await get_answer_key(request.question_ids)
+    return [
+        {
+            "question_id": question_id,
+            "correct_answer": answer_key[question_id]["correct_answer"],
+            "explanation": answer_key[question_id]["explanation"]
+        }
+        for question_id in dict.fromkeys(request.question_ids)
+        if question_id in answer_key
+    ]
 
 @api_router.get("/questions/flashcards", response_model=List[Question])
-async def get_flashcards(domain: Optional[int] = None, count: int = 20, current_user: dict = Depends(get_current_user)):
-    pipeline = []
-    if domain:
-        pipeline.append({"$match": {"domain": domain}})
-    pipeline.append({"$sample": {"size": count}})
-    pipeline.append({"$project": {"_id": 0}})
-    questions = await db.questions.aggregate(pipeline).to_list(count)
-    return questions
+async def get_flashcards(request: Request, response: Response, domain: Optional[int] = None, count: int = 20,
+                         seed: Optional[int] = None, current_user: dict = Depends(get_current_user)):
+    """
+    Random flashcard deck. With a seed the deck is fixed for a bank revision, so it
+    carries an ETag and can be revalidated; unseeded decks are never cached.
+    """
+    bank = await get_question_bank()
+    if seed is None:
+        return question_response(bank, bank.sample(count, domain))
+    etag = bank_etag(bank)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    deck = bank.sample(count, domain, random.Random(seed))
+    return tag_response(question_response(bank, deck), response, etag)
+
+# ============ SESSION HISTORY ============
+
+HISTORY_ROLLUP_DAYS = int(os.environ.get('HISTORY_ROLLUP_DAYS', '0'))
+
+async def migrate_legacy_history():
+    """
+    Move sessions embedded in progress["history"] into the study_sessions collection.
+    Idempotent (upsert by session id), so it is safe to run from every worker.
+    """
+    migrated = 0
+    async for progress in db.progress.find({"history": {"$exists": True}}, {"user_id": 1, "history": 1}):
+        ops = [
+            UpdateOne(
+                {"id": session["id"]},
+                {"$setOnInsert": {**session, "user_id": progress["user_id"]}},
+                upsert=True
+            )
+            for session in progress.get("history") or []
+        ]
+        if ops:
+            await db.study_sessions.bulk_write(ops, ordered=False)
+        await db.progress.update_one({"_id": progress["_id"]}, {"$unset": {"history": ""}})
+        migrated += len(ops)
+    if migrated:
+        logger.info(f"Migrated {migrated} legacy history sessions")
+    return migrated
+
+ROLLUP_JOB_ID = "rollup-sessions"
+ROLLUP_LEASE_SECONDS = 600
+
+def _rollup_add(field: str, batch: str) -> dict:
+    # Batches already folded into the rollup are skipped, so re-merging a batch is a no-op
+    return {"$cond": [
+        {"$in": [batch, {"$ifNull": ["$batches", []]}]},
+        f"${field}",
+        {"$add": [f"${field}", f"$$new.{field}"]}
+    ]}
+
+async def rollup_sessions(older_than_days: int) -> Optional[int]:
+    """
+    Fold sessions older than the cutoff into per-user, per-mode monthly totals
+    in session_rollups, then delete the raw sessions.
+    One worker at a time holds a lease on the admin_jobs document; others return None.
+    Sessions are first tagged with a batch id recorded on the job, and rollups remember
+    the batches they contain, so a run that crashed between merge and delete resumes
+    the same batch without counting it twice.
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        job = await db.admin_jobs.find_one_and_update(
+            {"_id": ROLLUP_JOB_ID, "$or": [{"locked_until": {"$exists": False}}, {"locked_until": {"$lte": now}}]},
+            {"$set": {"locked_until": now + timedelta(seconds=ROLLUP_LEASE_SECONDS), "owner": WORKER_ID}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # The job document exists and its lease is held by another worker
+        return None
+    
+    try:
+        batch = job.get("batch")
+        if batch is None:
+            batch = uuid.uuid4().hex
+            await db.admin_jobs.update_one({"_id": ROLLUP_JOB_ID}, {"$set": {"batch": batch}})
+            cutoff = (now - timedelta(days=older_than_days)).isoformat()
+            await db.study_sessions.update_many(
+                {"date": {"$lt": cutoff}, "rollup_batch": {"$exists": False}},
+                {"$set": {"rollup_batch": batch}}
+            )
+        
+        await db.study_sessions.aggregate([
+            {"$match": {"rollup_batch": batch}},
+            {"$group": {
+                "_id": {"user_id": "$user_id", "mode": "$mode", "month": {"$substrBytes": ["$date", 0, 7]}},
+                "sessions": {"$sum": 1},
+                "total_questions": {"$sum": "$total_questions"},
+                "correct_answers": {"$sum": "$correct_answers"},
+                "total_time": {"$sum": "$total_time"}
+            }},
+            {"$set": {"batches": [batch]}},
+            {"$merge": {
+                "into": "session_rollups",
+                "whenMatched": [{"$set": {
+                    "sessions": _rollup_add("sessions", batch),
+                    "total_questions": _rollup_add("total_questions", batch),
+                    "correct_answers": _rollup_add("correct_answers", batch),
+                    "total_time": _rollup_add("total_time", batch),
+                    "batches": {"$setUnion": [{"$ifNull": ["$batches", []]}, [batch]]}
+                }}],
+                "whenNotMatched": "insert"
+            }}
+        ]).to_list(None)
+        result = await db.study_sessions.delete_many({"rollup_batch": batch})
+        await db.admin_jobs.update_one({"_id": ROLLUP_JOB_ID}, {"$unset": {"batch": ""}})
+        return result.deleted_count
+    finally:
+        await db.admin_jobs.update_one(
+            {"_id": ROLLUP_JOB_ID, "owner": WORKER_ID},
+            {"$set": {"locked_until": datetime.now(timezone.utc)}}
+        )
 
 # ============ PROGRESS ROUTES ============
 
@@ -287,40 +891,67 @@ async def get_progress(current_user: dict = Depends(get_current_user)):
         last_study_date=progress.get("last_study_date")
     )
 
+def progress_update_pipeline(answered: int, correct: int, domain_counts: dict, today: str, yesterday: str) -> List[dict]:
+    """
+    Build a single atomic pipeline update for /progress/submit.
+    Counters are incremented server-side and the streak is derived from the stored
+    last_study_date, so concurrent submits from the same user never lose updates.
+    """
+    def inc(field, amount):
+        return {"$add": [{"$ifNull": [f"${field}", 0]}, amount]}
+    
+    counters = {
+        "total_questions_answered": inc("total_questions_answered", answered),
+        "correct_answers": inc("correct_answers", correct)
+    }
+    for domain_key, counts in domain_counts.items():
+        counters[f"domain_stats.{domain_key}.answered"] = inc(f"domain_stats.{domain_key}.answered", counts["answered"])
+        counters[f"domain_stats.{domain_key}.correct"] = inc(f"domain_stats.{domain_key}.correct", counts["correct"])
+    
+    return [
+        {"$set": {
+            "domain_stats": {"$ifNull": ["$domain_stats", {"$literal": {
+                str(i): {"answered": 0, "correct": 0} for i in range(1, 6)
+            }}]}
+        }},
+        {"$set": {
+            **counters,
+            # Studied yesterday -> extend; already studied today -> keep; otherwise restart
+            "current_streak": {"$switch": {
+                "branches": [
+                    {"case": {"$eq": ["$last_study_date", yesterday]},
+                     "then": inc("current_streak", 1)},
+                    {"case": {"$gt": ["$last_study_date", yesterday]},
+                     "then": {"$ifNull": ["$current_streak", 1]}}
+                ],
+                "default": 1
+            }}
+        }},
+        {"$set": {
+            "longest_streak": {"$max": [{"$ifNull": ["$longest_streak", 0]}, "$current_streak"]},
+            "last_study_date": today
+        }}
+    ]
+
 @api_router.post("/progress/submit")
 async def submit_answers(submission: ExamSubmit, current_user: dict = Depends(get_current_user)):
     user_id = current_user["id"]
-    progress = await db.progress.find_one({"user_id": user_id})
-    
-    if not progress:
-        progress = {
-            "user_id": user_id,
-            "total_questions_answered": 0,
-            "correct_answers": 0,
-            "domain_stats": {str(i): {"answered": 0, "correct": 0} for i in range(1, 6)},
-            "current_streak": 0,
-            "longest_streak": 0,
-            "last_study_date": None,
-            "history": []
-        }
-    
     results = []
     correct_count = 0
+    domain_counts = {}
+    answer_key = await get_answer_key([a.question_id for a in submission.answers])
     
     for answer in submission.answers:
-        question = await db.questions.find_one({"id": answer.question_id}, {"_id": 0})
+        question = answer_key.get(answer.question_id)
         if question:
             is_correct = answer.selected_answer == question["correct_answer"]
             if is_correct:
                 correct_count += 1
             
-            domain_key = str(question["domain"])
-            if domain_key not in progress["domain_stats"]:
-                progress["domain_stats"][domain_key] = {"answered": 0, "correct": 0}
-            
-            progress["domain_stats"][domain_key]["answered"] += 1
+            counts = domain_counts.setdefault(str(question["domain"]), {"answered": 0, "correct": 0})
+            counts["answered"] += 1
             if is_correct:
-                progress["domain_stats"][domain_key]["correct"] += 1
+                counts["correct"] += 1
             
             results.append({
                 "question_id": answer.question_id,
@@ -334,47 +965,29 @@ async def submit_answers(submission: ExamSubmit, current_user: dict = Depends(ge
                 "domain_name": question["domain_name"]
             })
     
-    progress["total_questions_answered"] += len(submission.answers)
-    progress["correct_answers"] += correct_count
-    
-    # Update streak
-    today = datetime.now(timezone.utc).date().isoformat()
-    last_date = progress.get("last_study_date")
-    
-    if last_date:
-        last_date_obj = datetime.fromisoformat(last_date).date() if isinstance(last_date, str) else last_date
-        today_obj = datetime.fromisoformat(today)
-        diff = (today_obj - datetime.fromisoformat(str(last_date_obj))).days
-        
-        if diff == 1:
-            progress["current_streak"] += 1
-        elif diff > 1:
-            progress["current_streak"] = 1
-    else:
-        progress["current_streak"] = 1
-    
-    progress["longest_streak"] = max(progress["longest_streak"], progress["current_streak"])
-    progress["last_study_date"] = today
+    now = datetime.now(timezone.utc)
+    await db.progress.update_one(
+        {"user_id": user_id},
+        progress_update_pipeline(
+            answered=len(submission.answers),
+            correct=correct_count,
+            domain_counts=domain_counts,
+            today=now.date().isoformat(),
+            yesterday=(now - timedelta(days=1)).date().isoformat()
+        ),
+        upsert=True
+    )
     
     # Save session history
-    session = {
+    await db.study_sessions.insert_one({
         "id": str(uuid.uuid4()),
+        "user_id": user_id,
         "mode": submission.mode,
-        "date": datetime.now(timezone.utc).isoformat(),
+        "date": now.isoformat(),
         "total_questions": len(submission.answers),
         "correct_answers": correct_count,
         "total_time": submission.total_time
-    }
-    
-    if "history" not in progress:
-        progress["history"] = []
-    progress["history"].append(session)
-    
-    await db.progress.update_one(
-        {"user_id": user_id},
-        {"$set": progress},
-        upsert=True
-    )
+    })
     
     accuracy = (correct_count / len(submission.answers) * 100) if submission.answers else 0
     
@@ -389,11 +1002,30 @@ async def submit_answers(submission: ExamSubmit, current_user: dict = Depends(ge
     }
 
 @api_router.get("/progress/history")
-async def get_history(limit: int = 10, current_user: dict = Depends(get_current_user)):
-    progress = await db.progress.find_one({"user_id": current_user["id"]}, {"_id": 0})
-    if not progress or "history" not in progress:
-        return []
-    return progress["history"][-limit:][::-1]
+async def get_history(response: Response, limit: int = 10, before: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """
+    Newest-first session history, paginated by keyset cursor.
+    Pass the X-Next-Cursor header from one page as `before` to fetch the next.
+    """
+    limit = max(1, min(limit, 100))
+    query = {"user_id": current_user["id"]}
+    if before:
+        date, _, session_id = before.rpartition("|")
+        if not date:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query["$or"] = [
+            {"date": {"$lt": date}},
+            {"date": date, "id": {"$lt": session_id}}
+        ]
+    
+    sessions = await db.study_sessions.find(
+        query, {"_id": 0, "user_id": 0}
+    ).sort([("date", -1), ("id", -1)]).limit(limit).to_list(limit)
+    
+    if len(sessions) == limit:
+        last = sessions[-1]
+        response.headers["X-Next-Cursor"] = f"{last['date']}|{last['id']}"
+    return sessions
 
 @api_router.get("/progress/weak-areas")
 async def get_weak_areas(current_user: dict = Depends(get_current_user)):
@@ -401,21 +1033,13 @@ async def get_weak_areas(current_user: dict = Depends(get_current_user)):
     if not progress:
         return []
     
-    domain_names = {
-        "1": "General Security Concepts",
-        "2": "Threats, Vulnerabilities & Mitigations",
-        "3": "Security Architecture",
-        "4": "Security Operations",
-        "5": "Security Program Management"
-    }
-    
     weak_areas = []
     for domain, stats in progress.get("domain_stats", {}).items():
         if stats["answered"] > 0:
             accuracy = (stats["correct"] / stats["answered"]) * 100
             weak_areas.append({
                 "domain": int(domain),
-                "domain_name": domain_names.get(domain, f"Domain {domain}"),
+                "domain_name": DOMAIN_NAMES.get(int(domain), f"Domain {domain}"),
                 "answered": stats["answered"],
                 "correct": stats["correct"],
                 "accuracy": round(accuracy, 1)
@@ -424,6 +1048,261 @@ async def get_weak_areas(current_user: dict = Depends(get_current_user)):
     weak_areas.sort(key=lambda x: x["accuracy"])
     return weak_areas
 
+# ============ DUE QUEUES ============
+
+class DueQueue:
+    """
+    One user's SR cards in a min-heap keyed by next_review.
+    Updates push a fresh heap entry and leave the old one behind; stale entries are
+    recognised (next_review no longer matches the card) and skipped when popped.
+    """
+
+    def __init__(self, cards: List[dict]):
+        self.cards = {c["question_id"]: c for c in cards}
+        self.heap = [(c["next_review"], c["question_id"]) for c in cards]
+        heapq.heapify(self.heap)
+        self.loaded_at = time.monotonic()
+
+    def update(self, card: dict):
+        self.cards[card["question_id"]] = card
+        heapq.heappush(self.heap, (card["next_review"], card["question_id"]))
+        if len(self.heap) > 2 * len(self.cards):
+            self.heap = [(c["next_review"], c["question_id"]) for c in self.cards.values()]
+            heapq.heapify(self.heap)
+
+    def due(self, today: str, limit: int) -> List[dict]:
+        """Up to `limit` cards due on or before `today`, earliest first - O(k log n)"""
+        taken = []
+        result = []
+        seen = set()
+        while self.heap and len(result) < limit and self.heap[0][0] <= today:
+            next_review, question_id = heapq.heappop(self.heap)
+            card = self.cards.get(question_id)
+            if card is None or card["next_review"] != next_review or question_id in seen:
+                continue  # stale or duplicate entry - drop it
+            seen.add(question_id)
+            taken.append((next_review, question_id))
+            result.append(card)
+        # Cards stay due until reviewed, so put them back
+        for entry in taken:
+            heapq.heappush(self.heap, entry)
+        return result
+
+class DueQueueCache:
+    """
+    Per-user DueQueues, loaded lazily and kept in LRU order. Least recently used
+    users are evicted once the total number of cached cards exceeds `max_cards`;
+    queues are reloaded after `ttl` seconds, or sooner when the invalidation bus
+    reports a write from another worker. A write that lands while a user's queue is
+    loading makes that load stale, and it is read again rather than cached.
+    """
+
+    def __init__(self, max_cards: int, ttl: float):
+        self.max_cards = max_cards
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._queues = OrderedDict()
+        self._cards = 0
+        self._writes = {}  # user id -> writes seen while a load is in flight
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_cards > 0
+
+    async def get(self, user_id: str) -> DueQueue:
+        queue = self._queues.get(user_id)
+        if queue and time.monotonic() - queue.loaded_at < self.ttl:
+            self._queues.move_to_end(user_id)
+            self.hits += 1
+            return queue
+        self.misses += 1
+        queue = await self._load(user_id)
+        self._drop(user_id)
+        self._queues[user_id] = queue
+        self._cards += len(queue.cards)
+        while self._cards > self.max_cards and len(self._queues) > 1:
+            evicted_user, _ = next(iter(self._queues.items()))
+            self._drop(evicted_user)
+        return queue
+
+    async def _load(self, user_id: str) -> DueQueue:
+        """Read the user's cards, again if a write raced the read"""
+        while True:
+            loading = self._writes.setdefault(user_id, {"loads": 0, "writes": 0})
+            loading["loads"] += 1
+            writes = loading["writes"]
+            try:
+                cards = await db.spaced_repetition.find({"user_id": user_id}, {"_id": 0}).to_list(None)
+            finally:
+                loading["loads"] -= 1
+                if not loading["loads"]:
+                    del self._writes[user_id]
+            if loading["writes"] == writes:
+                return DueQueue(cards)
+
+    def _mark_written(self, user_id: str):
+        loading = self._writes.get(user_id)
+        if loading:
+            loading["writes"] += 1
+
+    def update(self, user_id: str, card: dict):
+        """Apply a reviewed card to the user's queue, if it is cached"""
+        self._mark_written(user_id)
+        queue = self._queues.get(user_id)
+        if queue:
+            added = card["question_id"] not in queue.cards
+            queue.update(card)
+            self._cards += added
+
+    def evict(self, user_id: str):
+        """Drop the user's queue after a write elsewhere; it is reloaded on next use"""
+        self._mark_written(user_id)
+        self._drop(user_id)
+
+    def _drop(self, user_id: str):
+        queue = self._queues.pop(user_id, None)
+        if queue:
+            self._cards -= len(queue.cards)
+
+    def clear(self):
+        self._queues.clear()
+        self._cards = 0
+
+    def stats(self) -> dict:
+        return {"users": len(self._queues), "cards": self._cards, "max_cards": self.max_cards,
+                "hits": self.hits, "misses": self.misses}
+
+due_queues = DueQueueCache(max_cards=DUE_QUEUE_MAX_CARDS, ttl=DUE_QUEUE_TTL)
+
+# ============ CROSS-WORKER INVALIDATION ============
+
+WORKER_ID = uuid.uuid4().hex
+INVALIDATION_EVENT_TTL = 3600  # seconds an invalidation event is kept
+INVALIDATION_SLACK = 5.0  # seconds of overlap between polls, absorbing clock skew between writers
+USER_EVENT = "user"  # a user document changed: drop the cached user record
+DUE_QUEUE_EVENT = "due_queue"  # a user's SR cards changed: drop their due queue
+
+class InvalidationBus:
+    """
+    Keeps this worker's in-process caches in step with writes made by other workers
+    or instances, using only MongoDB. Question bank writes bump the persisted bank
+    version; per-user writes insert an `invalidations` event naming what changed
+    (USER_EVENT for user documents, DUE_QUEUE_EVENT for SR cards), so other workers
+    evict only that cache. A change stream delivers both where the deployment supports one (replica
+    sets, Atlas); otherwise the bus polls every `poll_interval` seconds. Either way
+    a worker reloads its question bank (and with it the exam pool, pre-encoded JSON
+    and inventory) and evicts the affected per-user cache within about one poll
+    interval of the write. Per-user events are only written with `user_events` on,
+    since a single worker has no other caches to evict.
+    """
+
+    def __init__(self, poll_interval: float, use_change_stream: bool, user_events: bool):
+        self.poll_interval = poll_interval
+        self.use_change_stream = use_change_stream
+        self.user_events = user_events
+        self.mode = "disabled"
+        self.bank_reloads = 0
+        self.user_evictions = 0
+        self.due_queue_evictions = 0
+        self._since = datetime.now(timezone.utc)
+        self._seen = {}
+        self._task = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.poll_interval > 0
+
+    async def publish(self, kind: str, user_id: str):
+        """Tell other workers to drop their `kind` cache entry for `user_id`"""
+        if not (self.enabled and self.user_events):
+            return
+        if kind == DUE_QUEUE_EVENT and not due_queues.enabled:
+            return  # no worker caches due queues
+        await db.invalidations.insert_one({
+                "kind": kind, "key": user_id, "origin": WORKER_ID, "at": datetime.now(timezone.utc)
+            })
+
+    async def sync_bank(self):
+        if question_bank.loaded and await read_bank_version() != question_bank.revision:
+            await question_bank.reload()
+            self.bank_reloads += 1
+
+    def apply(self, event: dict):
+        if event.get("origin") == WORKER_ID:
+            return
+        if event.get("kind") == USER_EVENT:
+            user_cache.evict(event["key"])
+            self.user_evictions += 1
+        elif event.get("kind") == DUE_QUEUE_EVENT:
+            due_queues.evict(event["key"])
+            self.due_queue_evictions += 1
+
+    async def poll_once(self):
+        await self.sync_bank()
+        if not self.user_events:
+            return
+        # Re-read an overlapping window so events written with a slightly skewed
+        # clock are not missed; already-applied events are skipped by _id
+        since = self._since - timedelta(seconds=INVALIDATION_SLACK)
+        async for event in db.invalidations.find({"at": {"$gt": since}}).sort("at", 1):
+            if event["_id"] not in self._seen:
+                self._seen[event["_id"]] = event["at"]
+                self.apply(event)
+            self._since = max(self._since, event["at"].replace(tzinfo=timezone.utc))
+        self._seen = {k: at for k, at in self._seen.items() if at.replace(tzinfo=timezone.utc) > since}
+
+    async def _watch(self):
+        pipeline = [{"$match": {"$or": [
+            {"ns.coll": "versions"},
+            {"ns.coll": "invalidations", "operationType": "insert"}
+        ]}}]
+        async with db.watch(pipeline) as stream:
+            self.mode = "change_stream"
+            # Catch up on anything written before the stream opened
+            await self.poll_once()
+            async for change in stream:
+                if change["ns"]["coll"] == "versions":
+                    await self.sync_bank()
+                else:
+                    self.apply(change["fullDocument"])
+
+    async def _run(self):
+        if self.use_change_stream:
+            try:
+                await self._watch()
+            except PyMongoError as e:
+                # Standalone servers have no change streams; a broken stream falls back too
+                logger.info(f"Invalidation change stream unavailable ({e}); polling every {self.poll_interval}s")
+        self.mode = "poll"
+        while True:
+            try:
+                await self.poll_once()
+            except PyMongoError as e:
+                logger.error(f"Invalidation poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"worker": WORKER_ID, "mode": self.mode, "poll_interval": self.poll_interval,
+                "user_events": self.user_events,
+                "bank_reloads": self.bank_reloads, "user_evictions": self.user_evictions,
+                "due_queue_evictions": self.due_queue_evictions}
+
+invalidation_bus = InvalidationBus(INVALIDATION_POLL_INTERVAL, INVALIDATION_CHANGE_STREAM, INVALIDATION_USER_EVENTS)
+
 # ============ SPACED REPETITION ROUTES ============
 
 def calculate_sm2(quality: int, repetitions: int, ease_factor: float, interval: int):
@@ -449,87 +1328,280 @@ def calculate_sm2(quality: int, repetitions: int, ease_factor: float, interval:
     
     return repetitions + 1, new_ease_factor, new_interval
 
+def calculate_sm2_batch(quality, repetitions, ease_factor, interval):
+    """
+    Vectorized calculate_sm2: takes equal-length arrays and returns
+    (new_repetitions, new_ease_factor, new_interval) arrays with the same results
+    as applying calculate_sm2 element-wise.
+    """
+    quality = np.asarray(quality, dtype=np.int64)
+    repetitions = np.asarray(repetitions, dtype=np.int64)
+    ease_factor = np.asarray(ease_factor, dtype=np.float64)
+    interval = np.asarray(interval, dtype=np.int64)
+    
+    passed = quality >= 3
+    miss = 5 - quality
+    passed_ef = ease_factor + (0.1 - miss * (0.08 + miss * 0.02))
+    # np.round rounds half to even, like Python's round()
+    passed_interval = np.where(
+        repetitions == 0, 1,
+        np.where(repetitions == 1, 3, np.round(interval * ease_factor).astype(np.int64))
+    )
+    
+    new_repetitions = np.where(passed, repetitions + 1, 0)
+    new_ease_factor = np.maximum(1.3, np.where(passed, passed_ef, ease_factor - 0.2))
+    new_interval = np.where(passed, passed_interval, 1)
+    return new_repetitions, new_ease_factor, new_interval
+
+def forecast_reviews(due_in, repetitions, ease_factor, interval, new_cards: int, days: int,
+                     new_per_day: int = 10, quality: int = 4):
+    """
+    Simulate a deck `days` ahead, assuming every due card is reviewed on its due day
+    with the given quality and `new_per_day` unseen cards are introduced each day.
+    `due_in` holds each existing card's days until due (<= 0 means due today).
+    Returns (due_per_day, new_per_day) count arrays of length `days`.
+    """
+    introduced = min(new_cards, new_per_day * days)
+    new_days = np.arange(introduced) // max(1, new_per_day)
+    
+    due_day = np.concatenate([np.maximum(np.asarray(due_in, dtype=np.int64), 0), new_days])
+    repetitions = np.concatenate([np.asarray(repetitions, dtype=np.int64), np.zeros(introduced, np.int64)])
+    ease_factor = np.concatenate([np.asarray(ease_factor, dtype=np.float64), np.full(introduced, 2.5)])
+    interval = np.concatenate([np.asarray(interval, dtype=np.int64), np.zeros(introduced, np.int64)])
+    
+    due_counts = np.zeros(days, dtype=np.int64)
+    new_counts = np.bincount(new_days, minlength=days)[:days]
+    for day in range(days):
+        due = np.flatnonzero(due_day == day)
+        if due.size == 0:
+            continue
+        due_counts[day] = due.size
+        reps, ef, ivl = calculate_sm2_batch(np.full(due.size, quality), repetitions[due], ease_factor[due], interval[due])
+        repetitions[due], ease_factor[due], interval[due] = reps, ef, ivl
+        due_day[due] = day + ivl
+    return due_counts, new_counts
+
+async def backfill_question_fingerprints():
+    """Fingerprint questions written before fingerprints were stored"""
+    ops = []
+    added = duplicates = 0
+    async for q in db.questions.find({"fingerprint": {"$exists": False}, "question": {"$type": "string"}}, {"question": 1}):
+        ops.append(UpdateOne({"_id": q["_id"]}, {"$set": {"fingerprint": question_fingerprint(q["question"])}}))
+        if len(ops) == 1000:
+            rejected = await write_ignoring_duplicates(db.questions, ops)
+            added, duplicates, ops = added + len(ops) - rejected, duplicates + rejected, []
+    rejected = await write_ignoring_duplicates(db.questions, ops)
+    added, duplicates = added + len(ops) - rejected, duplicates + rejected
+    if added or duplicates:
+        logger.info(f"Fingerprinted {added} questions; {duplicates} duplicates left unfingerprinted")
+    return added, duplicates
+
+async def backfill_card_domains():
+    """Store the question's domain on SR cards created before cards carried it"""
+    bank = await get_question_bank()
+    ops = []
+    updated = 0
+    async for card in db.spaced_repetition.find({"domain": {"$exists": False}}, {"question_id": 1}):
+        question = bank.get(card["question_id"])
+        ops.append(UpdateOne({"_id": card["_id"]}, {"$set": {"domain": question["domain"] if question else None}}))
+        if len(ops) == 1000:
+            await db.spaced_repetition.bulk_write(ops, ordered=False)
+            updated += len(ops)
+            ops = []
+    if ops:
+        await db.spaced_repetition.bulk_write(ops, ordered=False)
+        updated += len(ops)
+    if updated:
+        logger.info(f"Backfilled domain on {updated} SR cards")
+    return updated
+
 @api_router.get("/spaced-repetition/stats", response_model=SpacedRepetitionStats)
 async def get_sr_stats(current_user: dict = Depends(get_current_user)):
     user_id = current_user["id"]
     today = datetime.now(timezone.utc).date().isoformat()
+    bank = await get_question_bank()
     
-    # Get all questions count
-    total_questions = await db.questions.count_documents({})
-    
-    # Get user's SR cards
-    cards = await db.spaced_repetition.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
+    # Count the user's cards per domain in one grouped aggregation
+    groups = await db.spaced_repetition.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$group": {
+            "_id": "$domain",
+            "reviewed": {"$sum": 1},
+            "due": {"$sum": {"$cond": [{"$lte": ["$next_review", today]}, 1, 0]}},
+            "mastered": {"$sum": {"$cond": [{"$gt": ["$interval", 21]}, 1, 0]}}
+        }}
+    ]).to_list(None)
     
-    reviewed_ids = {c["question_id"] for c in cards}
-    new_cards = total_questions - len(reviewed_ids)
+    by_domain = {}
+    for domain, questions in bank.by_domain.items():
+        by_domain[str(domain)] = {"reviewed": 0, "due": 0, "mastered": 0, "learning": 0, "new": len(questions)}
+    for group in groups:
+        # Cards reviewed before domains were stored on cards are grouped as "unknown"
+        key = str(group["_id"]) if group["_id"] is not None else "unknown"
+        stats = by_domain.setdefault(key, {"reviewed": 0, "due": 0, "mastered": 0, "learning": 0, "new": 0})
+        stats["reviewed"] += group["reviewed"]
+        stats["due"] += group["due"]
+        stats["mastered"] += group["mastered"]
+        stats["learning"] += group["reviewed"] - group["mastered"]
+        stats["new"] = max(0, stats["new"] - group["reviewed"])
     
-    due_today = 0
-    mastered = 0
-    learning = 0
-    
-    for card in cards:
-        if card["next_review"] <= today:
-            due_today += 1
-        if card["interval"] > 21:
-            mastered += 1
-        else:
-            learning += 1
+    total_questions = len(bank.questions)
+    reviewed = sum(g["reviewed"] for g in groups)
+    mastered = sum(g["mastered"] for g in groups)
+    new_cards = max(0, total_questions - reviewed)
     
     # Include new cards in due count (limit to 10 new per day)
-    due_today += min(10, new_cards)
+    due_today = sum(g["due"] for g in groups) + min(10, new_cards)
     
     return SpacedRepetitionStats(
         total_cards=total_questions,
         due_today=due_today,
         mastered=mastered,
-        learning=learning,
-        new_cards=new_cards
+        learning=reviewed - mastered,
+        new_cards=new_cards,
+        by_domain=by_domain
     )
 
+MAX_FORECAST_DAYS = 730
+
+@api_router.get("/spaced-repetition/forecast")
+async def get_sr_forecast(days: int = 30, new_per_day: int = 10, quality: int = 4, current_user: dict = Depends(get_current_user)):
+    """Per-day due-card histogram for the next `days` days (`due` includes that day's `new` cards)"""
+    if days < 1 or days > MAX_FORECAST_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {MAX_FORECAST_DAYS}")
+    if quality < 0 or quality > 5:
+        raise HTTPException(status_code=400, detail="Quality must be between 0 and 5")
+    if new_per_day < 0:
+        raise HTTPException(status_code=400, detail="new_per_day must not be negative")
+    
+    user_id = current_user["id"]
+    today = datetime.now(timezone.utc).date()
+    bank = await get_question_bank()
+    cards = await db.spaced_repetition.find(
+        {"user_id": user_id},
+        {"_id": 0, "next_review": 1, "repetitions": 1, "ease_factor": 1, "interval": 1}
+    ).to_list(None)
+    
+    due_counts, new_counts = forecast_reviews(
+        due_in=[(datetime.fromisoformat(c["next_review"]).date() - today).days for c in cards],
+        repetitions=[c["repetitions"] for c in cards],
+        ease_factor=[c["ease_factor"] for c in cards],
+        interval=[c["interval"] for c in cards],
+        new_cards=max(0, len(bank.questions) - len(cards)),
+        days=days,
+        new_per_day=new_per_day,
+        quality=quality
+    )
+    
+    return {
+        "days": days,
+        "forecast": [
+            {"date": (today + timedelta(days=day)).isoformat(), "due": int(due_counts[day]), "new": int(new_counts[day])}
+            for day in range(days)
+        ]
+    }
+
+NEW_CARD_WINDOW = 50
+
+async def pick_new_cards(user_id: str, count: int, known_cards: Optional[dict] = None) -> List[dict]:
+    """
+    Pick up to `count` never-reviewed questions for a user.
+    Questions are introduced in the bank's stable id ordering. progress.new_card_cursor
+    marks the end of the prefix of that ordering the user has fully reviewed, so each
+    call only checks a small window past the cursor with one indexed $in lookup instead
+    of excluding every reviewed id. When the user's cards are already in memory
+    (`known_cards`, by question id) the window is checked without the database.
+    """
+    bank = await get_question_bank()
+    progress = await db.progress.find_one({"user_id": user_id}, {"_id": 0, "new_card_cursor": 1})
+    start_cursor = (progress or {}).get("new_card_cursor", "")
+    cursor = start_cursor
+    prefix_end = start_cursor
+    prefix_open = True
+    wrapped = False
+    picked = []
+    picked_ids = set()
+    
+    while len(picked) < count:
+        window = bank.ids_after(cursor, NEW_CARD_WINDOW)
+        if wrapped:
+            # Everything past the starting cursor was scanned before wrapping
+            window = [question_id for question_id in window if question_id <= start_cursor]
+        if not window:
+            if wrapped or not start_cursor:
+                break
+            # Reached the end of the ordering; restart only if questions added
+            # since (with ids below the cursor) are still unseen
+            if known_cards is not None:
+                reviewed = len(known_cards)
+            else:
+                reviewed = await db.spaced_repetition.count_documents({"user_id": user_id})
+            if reviewed >= len(bank.ordered_ids):
+                break
+            cursor = prefix_end = ""
+            wrapped = True
+            continue
+        
+        if known_cards is not None:
+            seen = {question_id for question_id in window if question_id in known_cards}
+        else:
+            seen = set(await db.spaced_repetition.distinct(
+                "question_id", {"user_id": user_id, "question_id": {"$in": window}}
+            ))
+        for question_id in window:
+            if question_id in seen:
+                if prefix_open:
+                    prefix_end = question_id
+                continue
+            prefix_open = False
+            if question_id in picked_ids:
+                continue
+            picked_ids.add(question_id)
+            picked.append(bank.get(question_id))
+            if len(picked) == count:
+                break
+        cursor = window[-1]
+    
+    if prefix_end != start_cursor:
+        await db.progress.update_one({"user_id": user_id}, {"$set": {"new_card_cursor": prefix_end}})
+    return picked
+
 @api_router.get("/spaced-repetition/due")
 async def get_due_cards(limit: int = 20, current_user: dict = Depends(get_current_user)):
     user_id = current_user["id"]
     today = datetime.now(timezone.utc).date().isoformat()
     
-    # Get cards due for review
-    due_cards = await db.spaced_repetition.find(
-        {"user_id": user_id, "next_review": {"$lte": today}},
-        {"_id": 0}
-    ).sort("next_review", 1).limit(limit).to_list(limit)
-    
-    due_question_ids = [c["question_id"] for c in due_cards]
-    
-    # Get new questions (never reviewed) - use distinct for efficiency
-    reviewed_ids = await db.spaced_repetition.distinct("question_id", {"user_id": user_id})
+    bank = await get_question_bank()
     
-    new_needed = max(0, limit - len(due_cards))
-    if new_needed > 0:
-        new_questions = await db.questions.find(
-            {"id": {"$nin": reviewed_ids}},
-            {"_id": 0}
-        ).limit(min(10, new_needed)).to_list(min(10, new_needed))
+    # Get cards due for review
+    known_cards = None
+    if due_queues.enabled:
+        queue = await due_queues.get(user_id)
+        due_cards = queue.due(today, limit)
+        known_cards = queue.cards
     else:
-        new_questions = []
-    
-    # Get full question data for due cards
-    due_questions = []
-    if due_question_ids:
-        due_questions = await db.questions.find(
-            {"id": {"$in": due_question_ids}},
+        due_cards = await db.spaced_repetition.find(
+            {"user_id": user_id, "next_review": {"$lte": today}},
             {"_id": 0}
-        ).to_list(len(due_question_ids))
+        ).sort("next_review", 1).limit(limit).to_list(limit)
+    
+    # Get new questions (never reviewed)
+    new_needed = max(0, limit - len(due_cards))
+    new_questions = await pick_new_cards(user_id, min(10, new_needed), known_cards) if new_needed > 0 else []
     
-    # Combine and add SR metadata
+    # Combine with full question data and add SR metadata
     result = []
     
-    for q in due_questions:
-        card = next((c for c in due_cards if c["question_id"] == q["id"]), None)
+    for card in due_cards:
+        q = bank.get(card["question_id"])
+        if not q:
+            continue
         result.append({
             **q,
             "sr_data": {
-                "ease_factor": card["ease_factor"] if card else 2.5,
-                "interval": card["interval"] if card else 0,
-                "repetitions": card["repetitions"] if card else 0,
+                "ease_factor": card["ease_factor"],
+                "interval": card["interval"],
+                "repetitions": card["repetitions"],
                 "is_new": False
             }
         })
@@ -547,21 +1619,8 @@ async def get_due_cards(limit: int = 20, current_user: dict = Depends(get_curren
     
     return result
 
-@api_router.post("/spaced-repetition/review")
-async def submit_review(review: ReviewSubmit, current_user: dict = Depends(get_current_user)):
-    user_id = current_user["id"]
-    today = datetime.now(timezone.utc)
-    
-    # Validate quality rating
-    if review.quality < 0 or review.quality > 5:
-        raise HTTPException(status_code=400, detail="Quality must be between 0 and 5")
-    
-    # Get existing card or create new
-    existing = await db.spaced_repetition.find_one(
-        {"user_id": user_id, "question_id": review.question_id},
-        {"_id": 0}
-    )
-    
+def review_card(user_id: str, question_id: str, existing: Optional[dict], quality: int, reviewed_at: datetime, domain: Optional[int]) -> dict:
+    """Apply one SM-2 review to a card (or a fresh card) and return the new card document"""
     if existing:
         repetitions = existing["repetitions"]
         ease_factor = existing["ease_factor"]
@@ -572,103 +1631,550 @@ async def submit_review(review: ReviewSubmit, current_user: dict = Depends(get_c
         interval = 0
     
     # Calculate new values using SM-2
-    new_reps, new_ef, new_interval = calculate_sm2(review.quality, repetitions, ease_factor, interval)
-    
-    # Calculate next review date
-    next_review = (today + timedelta(days=new_interval)).date().isoformat()
+    new_reps, new_ef, new_interval = calculate_sm2(quality, repetitions, ease_factor, interval)
     
-    card_data = {
+    return {
         "user_id": user_id,
-        "question_id": review.question_id,
+        "question_id": question_id,
+        "domain": domain,
         "ease_factor": new_ef,
         "interval": new_interval,
         "repetitions": new_reps,
-        "next_review": next_review,
-        "last_review": today.isoformat()
+        "next_review": (reviewed_at + timedelta(days=new_interval)).date().isoformat(),
+        "last_review": reviewed_at.isoformat()
     }
+
+@api_router.post("/spaced-repetition/review")
+async def submit_review(review: ReviewSubmit, current_user: dict = Depends(get_current_user)):
+    user_id = current_user["id"]
+    today = datetime.now(timezone.utc)
+    
+    # Validate quality rating
+    if review.quality < 0 or review.quality > 5:
+        raise HTTPException(status_code=400, detail="Quality must be between 0 and 5")
+    
+    # Get existing card or create new
+    existing = await db.spaced_repetition.find_one(
+        {"user_id": user_id, "question_id": review.question_id},
+        {"_id": 0}
+    )
+    
+    bank = await get_question_bank()
+    question = bank.get(review.question_id)
+    card_data = review_card(
+        user_id, review.question_id, existing, review.quality, today,
+        question["domain"] if question else None
+    )
     
     await db.spaced_repetition.update_one(
         {"user_id": user_id, "question_id": review.question_id},
         {"$set": card_data},
         upsert=True
     )
+    due_queues.update(user_id, card_data)
+    await invalidation_bus.publish(DUE_QUEUE_EVENT, user_id)
     
     return {
         "success": True,
-        "next_review": next_review,
-        "interval": new_interval,
-        "ease_factor": round(new_ef, 2),
-        "repetitions": new_reps
+        "next_review": card_data["next_review"],
+        "interval": card_data["interval"],
+        "ease_factor": round(card_data["ease_factor"], 2),
+        "repetitions": card_data["repetitions"]
+    }
+
+MAX_REVIEW_BATCH = 1000
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+@api_router.post("/spaced-repetition/review/batch")
+async def submit_review_batch(batch: ReviewBatchSubmit, current_user: dict = Depends(get_current_user)):
+    """
+    Submit a whole review session at once (e.g. queued offline).
+    Reviews are applied in reviewed_at order, so repeated reviews of the same card
+    chain correctly, and all cards are persisted with one unordered bulk write.
+    """
+    user_id = current_user["id"]
+    now = datetime.now(timezone.utc)
+    
+    if len(batch.reviews) > MAX_REVIEW_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_REVIEW_BATCH} reviews per batch")
+    
+    reviews = []
+    for review in batch.reviews:
+        if review.quality < 0 or review.quality > 5:
+            raise HTTPException(status_code=400, detail="Quality must be between 0 and 5")
+        reviewed_at = now
+        if review.reviewed_at:
+            try:
+                reviewed_at = datetime.fromisoformat(review.reviewed_at)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid reviewed_at: {review.reviewed_at}")
+            if reviewed_at.tzinfo is None:
+                reviewed_at = reviewed_at.replace(tzinfo=timezone.utc)
+            reviewed_at = min(reviewed_at, now)
+        reviews.append((reviewed_at, review))
+    reviews.sort(key=lambda r: r[0])
+    
+    question_ids = list({review.question_id for _, review in reviews})
+    cards = {
+        card["question_id"]: card
+        async for card in db.spaced_repetition.find(
+            {"user_id": user_id, "question_id": {"$in": question_ids}}, {"_id": 0}
+        )
+    }
+    
+    # Last reviews as stored before this batch: later reviews in the batch chain
+    # onto each other, only ones at or before these were already applied
+    stored_reviews = {
+        qid: _as_utc(datetime.fromisoformat(card["last_review"]))
+        for qid, card in cards.items() if card.get("last_review")
+    }
+    
+    bank = await get_question_bank()
+    replayed = 0
+    for reviewed_at, review in reviews:
+        # A review at or before the card's stored last review was already applied
+        # (e.g. a client resending a batch whose response it never saw); skip it
+        stored = stored_reviews.get(review.question_id)
+        if stored and reviewed_at <= stored:
+            replayed += 1
+            continue
+        question = bank.get(review.question_id)
+        cards[review.question_id] = review_card(
+            user_id, review.question_id, cards.get(review.question_id), review.quality, reviewed_at,
+            question["domain"] if question else None
+        )
+    
+    if question_ids:
+        await db.spaced_repetition.bulk_write([
+            UpdateOne({"user_id": user_id, "question_id": qid}, {"$set": cards[qid]}, upsert=True)
+            for qid in question_ids
+        ], ordered=False)
+        for qid in question_ids:
+            due_queues.update(user_id, cards[qid])
+        await invalidation_bus.publish(DUE_QUEUE_EVENT, user_id)
+    
+    return {
+        "success": True,
+        "reviewed": len(reviews) - replayed,
+        "replayed": replayed,
+        "cards": [
+            {
+                "question_id": qid,
+                "next_review": cards[qid]["next_review"],
+                "interval": cards[qid]["interval"],
+                "ease_factor": round(cards[qid]["ease_factor"], 2),
+                "repetitions": cards[qid]["repetitions"]
+            }
+            for qid in question_ids
+        ]
     }
 
 # ============ SEED DATA ============
 
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_REJECTS = 100
+
+async def replace_questions(chunks: AsyncIterator[List[dict]]) -> dict:
+    """
+    Replace the question bank without downtime: chunks are written to a fresh, already
+    indexed staging collection, which is renamed over `questions` in one atomic step.
+    Readers see the old bank until the rename. Questions whose fingerprint duplicates an
+    earlier one are rejected by the unique index and counted.
+    """
+    staging = db[f"questions_staging_{uuid.uuid4().hex}"]
+    result = {"inserted": 0, "duplicates": 0}
+    swapped = False
+    try:
+        await staging.create_indexes(REQUIRED_INDEXES["questions"])
+        async for chunk in chunks:
+            duplicates = await write_ignoring_duplicates(
+                staging, [InsertOne(with_fingerprint(question)) for question in chunk]
+            )
+            result["inserted"] += len(chunk) - duplicates
+            result["duplicates"] += duplicates
+        if result["inserted"]:
+            await staging.rename("questions", dropTarget=True)
+            swapped = True
+    finally:
+        if not swapped:
+            await staging.drop()
+    if swapped:
+        await publish_bank_change()
+    return result
+
+async def _chunked(items: List[dict]) -> AsyncIterator[List[dict]]:
+    for start in range(0, len(items), IMPORT_CHUNK_SIZE):
+        yield items[start:start + IMPORT_CHUNK_SIZE]
+
 @api_router.post("/admin/bulk-import")
 async def bulk_import_questions(questions: List[dict]):
     """Bulk import questions - replaces all existing questions"""
-    # Clear existing questions
-    await db.questions.delete_many({})
+    if not questions:
+        # Nothing to swap in - clear the bank as before
+        await db.questions.delete_many({})
+        await publish_bank_change()
+        return {"message": "Imported 0 questions"}
     
-    # Insert new questions
-    if questions:
-        await db.questions.insert_many(questions)
+    result = await replace_questions(_chunked(questions))
+    return {"message": f"Imported {result['inserted']} questions", "duplicates": result["duplicates"]}
+
+@api_router.post("/admin/import-diff")
+async def import_questions_diff(questions: List[QuestionImport], dry_run: bool = False, delete_missing: bool = False):
+    """
+    Incrementally import questions, keeping existing question ids.
+    Incoming questions are matched to stored questions by normalized-text fingerprint
+    (one indexed $in query); only added and changed questions are written (one unordered
+    bulk write), so SR cards and history keep pointing at the same ids. Questions
+    missing from the payload are reported as removed and only deleted with
+    delete_missing=true. Writes the fingerprint index rejects are reported as rejected.
+    """
+    report = {"added": [], "changed": [], "removed": [], "unchanged": 0, "duplicates": [], "rejected": []}
+    incoming = {}
+    for item in questions:
+        question = item.model_dump()
+        fingerprint = question_fingerprint(question["question"])
+        if fingerprint in incoming:
+            report["duplicates"].append(question["question"])
+            continue
+        incoming[fingerprint] = question
     
-    return {"message": f"Imported {len(questions)} questions"}
+    existing = {
+        doc["fingerprint"]: doc
+        async for doc in db.questions.find({"fingerprint": {"$in": list(incoming)}})
+    }
+    new_ids = [q["id"] for fingerprint, q in incoming.items() if not existing.get(fingerprint, {}).get("id") and q["id"]]
+    taken_ids = set(await db.questions.distinct("id", {"id": {"$in": new_ids}})) if new_ids else set()
+    
+    ops = []
+    op_ids = []  # question id each op writes, for reporting rejections
+    for fingerprint, question in incoming.items():
+        current = existing.get(fingerprint)
+        if current is None:
+            if not question["id"] or question["id"] in taken_ids:
+                question["id"] = str(uuid.uuid4())
+            ops.append(InsertOne(with_fingerprint(question)))
+            op_ids.append(question["id"])
+            report["added"].append(question["id"])
+        elif not current.get("id") or question_content_hash(question) != question_content_hash(current):
+            content = {field: question[field] for field in CONTENT_FIELDS}
+            if not current.get("id"):
+                # Written by the old seed scripts without an id; give it one so it can be served
+                content["id"] = question["id"] if question["id"] and question["id"] not in taken_ids else str(uuid.uuid4())
+            question_id = content.get("id", current.get("id"))
+            ops.append(UpdateOne({"_id": current["_id"]}, {"$set": with_fingerprint(content)}))
+            op_ids.append(question_id)
+            report["changed"].append(question_id)
+        else:
+            report["unchanged"] += 1
+    
+    async for current in db.questions.find({"fingerprint": {"$nin": list(incoming)}}, {"id": 1, "question": 1, "fingerprint": 1}):
+        # Unfingerprinted copies of an incoming question are duplicates, not missing questions
+        if "fingerprint" not in current and question_fingerprint(current.get("question", "")) in incoming:
+            continue
+        question_id = current.get("id") or str(current["_id"])
+        report["removed"].append(question_id)
+        if delete_missing:
+            ops.append(DeleteOne({"_id": current["_id"]}))
+            op_ids.append(question_id)
+    
+    writes = 0
+    if ops and not dry_run:
+        rejected = []
+        try:
+            await write_ignoring_duplicates(db.questions, ops, rejected)
+        finally:
+            # Unordered writes may have partly applied even if the bulk write raised
+            await publish_bank_change()
+        report["rejected"] = [op_ids[index] for index in rejected]
+        writes = len(ops) - len(rejected)
+    
+    return {"dry_run": dry_run, "writes": writes, **report}
+
+@api_router.post("/admin/import-ndjson")
+async def import_questions_ndjson(request: Request, strict: bool = False):
+    """
+    Stream-import questions from an NDJSON body (one Question per line), replacing the bank.
+    Invalid lines are rejected and reported; with strict=true any rejection aborts the import.
+    Memory use is bounded by IMPORT_CHUNK_SIZE regardless of the payload size.
+    """
+    start = time.perf_counter()
+    stats = {"lines": 0, "rejected": 0, "rejects": []}
+    
+    def parse(line: bytes, chunk: List[dict]):
+        stats["lines"] += 1
+        if not line.strip():
+            return
+        try:
+            chunk.append(Question.model_validate_json(line).model_dump())
+        except ValidationError as e:
+            stats["rejected"] += 1
+            if len(stats["rejects"]) < MAX_REPORTED_REJECTS:
+                stats["rejects"].append({"line": stats["lines"], "error": e.errors(include_url=False)[0]["msg"]})
+            if strict:
+                raise HTTPException(status_code=400, detail={"message": "Import aborted", **stats})
+    
+    async def records() -> AsyncIterator[List[dict]]:
+        buffer = b""
+        chunk = []
+        async for data in request.stream():
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                parse(line, chunk)
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    yield chunk
+                    chunk = []
+        if buffer:
+            parse(buffer, chunk)
+        yield chunk
+    
+    result = await replace_questions(records())
+    imported = result["inserted"]
+    if not imported:
+        raise HTTPException(status_code=400, detail={"message": "No valid questions in payload", **stats})
+    
+    elapsed = time.perf_counter() - start
+    return {
+        "message": f"Imported {imported} questions",
+        "imported": imported,
+        "duplicates": result["duplicates"],
+        "rejected": stats["rejected"],
+        "rejects": stats["rejects"],
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(stats["lines"] / elapsed, 1) if elapsed else None
+    }
+
+RANDOMIZE_JOB_ID = "randomize-answers"
+RANDOMIZE_LEASE_SECONDS = 600  # renewed at every checkpoint
+
+def shuffle_options(options: List[dict], correct_answer: str, rng: random.Random):
+    """
+    Shuffle options in place and relabel them a, b, c, ... by position.
+    Options are put in a canonical (text) order first, so the result depends only
+    on the rng - re-shuffling an already shuffled question gives the same order.
+    Returns the new correct answer id, or None if the options can't be shuffled.
+    """
+    if not options or not all(isinstance(opt, dict) for opt in options):
+        return None
+    correct = next((opt for opt in options if opt.get('id') == correct_answer), None)
+    if correct is None:
+        return None
+    options.sort(key=lambda opt: str(opt.get('text', '')))
+    rng.shuffle(options)
+    for i, opt in enumerate(options):
+        opt['id'] = chr(ord('a') + i)
+    return correct['id']
 
 @api_router.post("/admin/randomize-answers")
-async def randomize_answers():
-    """Randomize answer positions so correct answer isn't always 'b'"""
-    import random
+async def randomize_answers(seed: Optional[int] = None, resume: bool = False, chunk_size: int = 500):
+    """
+    Randomize answer positions so correct answer isn't always 'b'.
+    Streams the bank in _id order and writes chunked bulk updates. Each question is
+    shuffled by an RNG seeded from (seed, question id), so a run is reproducible, and
+    progress is checkpointed in admin_jobs so resume=true continues an interrupted run.
+    The answer-position distribution is computed in the same pass.
+    One run at a time holds a lease on the job document; a concurrent request gets 409.
+    """
+    chunk_size = max(1, min(chunk_size, 5000))
+    now = datetime.now(timezone.utc)
+    try:
+        job = await db.admin_jobs.find_one_and_update(
+            {"_id": RANDOMIZE_JOB_ID, "$or": [{"locked_until": {"$exists": False}}, {"locked_until": {"$lte": now}}]},
+            {"$set": {"locked_until": now + timedelta(seconds=RANDOMIZE_LEASE_SECONDS), "owner": WORKER_ID}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Answer randomization is already running")
     
-    questions = await db.questions.find({}).to_list(1000)
-    updated = 0
+    try:
+        return await _randomize_answers(job, seed, resume, chunk_size)
+    finally:
+        await db.admin_jobs.update_one(
+            {"_id": RANDOMIZE_JOB_ID, "owner": WORKER_ID},
+            {"$set": {"locked_until": datetime.now(timezone.utc)}}
+        )
+
+async def _randomize_answers(job: dict, seed: Optional[int], resume: bool, chunk_size: int) -> dict:
+    if resume and job.get("seed") is not None and not job.get("completed"):
+        seed = job["seed"]
+    else:
+        if seed is None:
+            seed = random.randrange(2 ** 31)
+        # $set rather than replace, so the lease fields stay in place
+        fields = {"seed": seed, "last_id": None, "updated": 0, "distribution": {}, "completed": False,
+                  "started_at": datetime.now(timezone.utc).isoformat()}
+        await db.admin_jobs.update_one({"_id": RANDOMIZE_JOB_ID}, {"$set": fields})
+        job = {**job, **fields}
     
-    for q in questions:
-        options = q.get('options', [])
-        correct_answer = q.get('correct_answer')
-        
-        if not options or not correct_answer:
-            continue
-        
-        # Find the correct option text
-        correct_option = None
-        for opt in options:
-            if opt['id'] == correct_answer:
-                correct_option = opt.copy()
-                break
-        
-        if not correct_option:
-            continue
-        
-        # Shuffle options
-        random.shuffle(options)
-        
-        # Reassign IDs (a, b, c, d) based on new positions
-        new_correct_answer = None
-        ids = ['a', 'b', 'c', 'd']
-        for i, opt in enumerate(options):
-            if opt['text'] == correct_option['text']:
-                new_correct_answer = ids[i]
-            opt['id'] = ids[i]
-        
-        # Update in database
-        await db.questions.update_one(
-            {'_id': q['_id']},
-            {'$set': {
+    distribution = Counter(job["distribution"])
+    updated = job["updated"]
+    query = {"_id": {"$gt": job["last_id"]}} if job["last_id"] is not None else {}
+    
+    async def checkpoint(ops, last_id, completed=False):
+        await write_ignoring_duplicates(db.questions, ops)
+        await db.admin_jobs.update_one({"_id": RANDOMIZE_JOB_ID}, {"$set": {
+            "last_id": last_id, "updated": updated,
+            "distribution": dict(distribution), "completed": completed,
+            "locked_until": datetime.now(timezone.utc) + timedelta(seconds=RANDOMIZE_LEASE_SECONDS)
+        }})
+    
+    ops = []
+    last_id = job["last_id"]
+    cursor = db.questions.find(
+        query, {"id": 1, "question": 1, "fingerprint": 1, "options": 1, "correct_answer": 1}
+    ).sort("_id", 1).batch_size(chunk_size)
+    async for q in cursor:
+        # Backfill missing fingerprints in the same pass (separate op, so a duplicate
+        # fingerprint can't block the shuffle)
+        if "fingerprint" not in q and isinstance(q.get("question"), str):
+            ops.append(UpdateOne({'_id': q['_id']}, {'$set': {'fingerprint': question_fingerprint(q['question'])}}))
+        options = q.get('options') or []
+        rng = random.Random(f"{seed}:{q.get('id', q['_id'])}")
+        new_correct_answer = shuffle_options(options, q.get('correct_answer'), rng)
+        if new_correct_answer is None:
+            if isinstance(q.get('correct_answer'), str):
+                distribution[q['correct_answer']] += 1
+        else:
+            ops.append(UpdateOne({'_id': q['_id']}, {'$set': {
                 'options': options,
                 'correct_answer': new_correct_answer
-            }}
-        )
-        updated += 1
-    
-    # Get new distribution
-    all_answers = [q['correct_answer'] async for q in db.questions.find({}, {'correct_answer': 1})]
-    from collections import Counter
-    distribution = dict(Counter(all_answers))
+            }}))
+            distribution[new_correct_answer] += 1
+            updated += 1
+        last_id = q['_id']
+        if len(ops) >= chunk_size:
+            await checkpoint(ops, last_id)
+            ops = []
+    await checkpoint(ops, last_id, completed=True)
+    await publish_bank_change()
     
     return {
         "message": f"Randomized {updated} questions",
-        "distribution": distribution
+        "seed": seed,
+        "distribution": dict(distribution)
+    }
+
+def _normalized_domain_expr() -> dict:
+    """Aggregation expression mapping integer or domain-name `domain` values to the domain id"""
+    return {"$switch": {
+        "branches": [{"case": {"$isNumber": "$domain"}, "then": {"$toInt": "$domain"}}] + [
+            {"case": {"$eq": [{"$toLower": {"$ifNull": ["$domain", ""]}}, d["name"].lower()]}, "then": d["id"]}
+            for d in DOMAINS
+        ],
+        "default": None
+    }}
+
+def _problem(condition: dict, name: str) -> dict:
+    return {"$cond": [condition, [name], []]}
+
+async def question_inventory() -> dict:
+    """
+    Inventory of the question bank in one $facet aggregation: counts per domain (integer
+    and name-string encodings folded together), answer-position distribution, schema
+    violations by kind, and duplicate questions.
+    A duplicate usually has no fingerprint - the unique index rejected it during a
+    backfill - so unfingerprinted documents are returned by the facet, fingerprinted
+    here, and matched against the stored fingerprints with one indexed $in query.
+    """
+    result = await db.questions.aggregate([
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "by_domain": [
+                {"$group": {"_id": _normalized_domain_expr(), "count": {"$sum": 1}}},
+                {"$sort": {"_id": 1}}
+            ],
+            "answer_positions": [
+                {"$match": {"options.0.id": {"$exists": True}}},
+                {"$group": {"_id": "$correct_answer", "count": {"$sum": 1}}},
+                {"$sort": {"_id": 1}}
+            ],
+            "schema_violations": [
+                {"$project": {"problems": {"$concatArrays": [
+                    _problem({"$ne": [{"$type": "$id"}, "string"]}, "missing id"),
+                    _problem({"$not": [{"$in": [{"$type": "$domain"}, ["int", "long"]]}]}, "non-integer domain"),
+                    _problem({"$ne": [{"$type": {"$arrayElemAt": [{"$ifNull": ["$options", [None]]}, 0]}}, "object"]}, "options not objects"),
+                    _problem({"$not": [{"$in": ["$correct_answer", {"$ifNull": ["$options.id", []]}]}]}, "correct_answer not an option id"),
+                    _problem({"$ne": [{"$type": "$explanation"}, "string"]}, "missing explanation"),
+                    _problem({"$ne": [{"$type": "$fingerprint"}, "string"]}, "missing fingerprint")
+                ]}}},
+                {"$unwind": "$problems"},
+                {"$group": {"_id": "$problems", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}}
+            ],
+            # Only possible among fingerprinted documents if fingerprint_unique is missing
+            "duplicates": [
+                {"$match": {"fingerprint": {"$type": "string"}}},
+                {"$group": {"_id": "$fingerprint", "count": {"$sum": 1}, "question": {"$first": "$question"}}},
+                {"$match": {"count": {"$gt": 1}}}
+            ],
+            "unfingerprinted": [
+                {"$match": {"fingerprint": {"$exists": False}, "question": {"$type": "string"}}},
+                {"$project": {"_id": 0, "question": 1}}
+            ]
+        }}
+    ]).to_list(1)
+    facets = result[0]
+    
+    duplicates = {g["_id"]: {"question": g["question"], "count": g["count"]} for g in facets["duplicates"]}
+    copies = {}
+    for doc in facets["unfingerprinted"]:
+        copies.setdefault(question_fingerprint(doc["question"]), []).append(doc["question"])
+    if copies:
+        async for original in db.questions.find({"fingerprint": {"$in": list(copies)}}, {"fingerprint": 1, "question": 1}):
+            group = duplicates.setdefault(original["fingerprint"], {"question": original["question"], "count": 1})
+            group["count"] += len(copies.pop(original["fingerprint"]))
+        # Copies of each other with no fingerprinted original
+        for fingerprint, texts in copies.items():
+            if len(texts) > 1:
+                duplicates[fingerprint] = {"question": texts[0], "count": len(texts)}
+    return {
+        "total": facets["total"][0]["count"] if facets["total"] else 0,
+        "by_domain": {
+            str(g["_id"]) if g["_id"] is not None else "unknown": {
+                "name": DOMAIN_NAMES.get(g["_id"], "Unknown"), "count": g["count"]
+            }
+            for g in facets["by_domain"]
+        },
+        "answer_positions": {str(g["_id"]): g["count"] for g in facets["answer_positions"]},
+        "schema_violations": {g["_id"]: g["count"] for g in facets["schema_violations"]},
+        "duplicates": sorted(duplicates.values(), key=lambda g: -g["count"])
+    }
+
+# Inventory result for the bank version it was computed at
+inventory_cache = {"version": None, "result": None}
+
+@api_router.get("/admin/inventory")
+async def get_inventory():
+    """Question bank inventory, recomputed only when the bank version changes"""
+    bank = await get_question_bank()
+    if inventory_cache["version"] != bank.version:
+        inventory_cache["result"] = await question_inventory()
+        inventory_cache["version"] = bank.version
+    return {"bank_version": bank.revision, **inventory_cache["result"]}
+
+@api_router.post("/admin/rollup-history")
+async def rollup_history(older_than_days: int = 180):
+    """Roll up old study sessions into monthly totals"""
+    if older_than_days < 1:
+        raise HTTPException(status_code=400, detail="older_than_days must be at least 1")
+    rolled_up = await rollup_sessions(older_than_days)
+    if rolled_up is None:
+        raise HTTPException(status_code=409, detail="A history rollup is already running")
+    return {"message": f"Rolled up {rolled_up} sessions"}
+
+@api_router.get("/admin/cache-stats")
+async def cache_stats():
+    """Hit/miss counters for the in-process caches, plus response compression totals"""
+    return {
+        "users": user_cache.stats(),
+        "question_bank": {"loaded": question_bank.loaded, "revision": question_bank.revision, "size": len(question_bank.questions)},
+        "exam_pool": exam_pool.stats(),
+        "due_queues": due_queues.stats(),
+        "compression": compressor.stats(),
+        "invalidation": invalidation_bus.stats()
     }
 
 @api_router.post("/seed-questions")
@@ -678,9 +2184,10 @@ async def seed_questions():
     if count > 0:
         return {"message": f"Questions already seeded ({count} questions)"}
     
-    questions = get_seed_questions()
-    await db.questions.insert_many(questions)
-    return {"message": f"Seeded {len(questions)} questions"}
+    questions = [with_fingerprint(q) for q in get_seed_questions()]
+    duplicates = await write_ignoring_duplicates(db.questions, [InsertOne(q) for q in questions])
+    await publish_bank_change()
+    return {"message": f"Seeded {len(questions) - duplicates} questions"}
 
 def get_seed_questions():
     """CompTIA Security+ SY0-701 Practice Questions"""
@@ -1562,6 +3069,247 @@ def get_seed_questions():
     ]
     return questions
 
+# ============ INDEXES ============
+
+# Every index the API's queries rely on, by collection
+REQUIRED_INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+    ],
+    "questions": [
+        IndexModel([("id", ASCENDING)], name="id"),
+        IndexModel([("domain", ASCENDING)], name="domain"),
+        # Partial, so legacy documents without a fingerprint don't collide on null
+        IndexModel([("fingerprint", ASCENDING)], name="fingerprint_unique", unique=True,
+                   partialFilterExpression={"fingerprint": {"$type": "string"}})
+    ],
+    "progress": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True)
+    ],
+    "spaced_repetition": [
+        IndexModel([("user_id", ASCENDING), ("question_id", ASCENDING)], name="user_question_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("next_review", ASCENDING)], name="user_next_review")
+    ],
+    "study_sessions": [
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING), ("id", DESCENDING)], name="user_date_id"),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+    ],
+    "invalidations": [
+        IndexModel([("at", ASCENDING)], name="at_ttl", expireAfterSeconds=INVALIDATION_EVENT_TTL)
+    ]
+}
+
+# Representative filters for the hot queries; none may be served by a collection scan
+HOT_QUERIES = [
+    ("users", {"email": "user@example.com"}, None),
+    ("users", {"id": "user-id"}, None),
+    ("questions", {"id": {"$in": ["question-id"]}}, None),
+    ("progress", {"user_id": "user-id"}, None),
+    ("spaced_repetition", {"user_id": "user-id", "question_id": "question-id"}, None),
+    ("spaced_repetition", {"user_id": "user-id", "next_review": {"$lte": "2000-01-01"}}, {"next_review": 1}),
+    ("study_sessions", {"user_id": "user-id"}, {"date": -1, "id": -1}),
+    ("invalidations", {"at": {"$gt": datetime(2000, 1, 1, tzinfo=timezone.utc)}}, {"at": 1})
+]
+
+async def ensure_indexes():
+    """
+    Create every required index. create_indexes is a no-op for indexes that already
+    exist with the same spec, so concurrent workers can all run this at startup.
+    A failure on one collection (e.g. duplicate emails blocking a unique index) is
+    logged and does not stop the others.
+    """
+    failed = {}
+    for collection, indexes in REQUIRED_INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            failed[collection] = str(e)
+            logger.error(f"Index creation failed on {collection}: {e}")
+    return failed
+
+def _index_spec(index: dict) -> tuple:
+    # Shell-created indexes may store directions as doubles (1.0); normalize to ints
+    keys = tuple((field, int(direction) if isinstance(direction, float) else direction)
+                 for field, direction in index["key"].items())
+    return keys, bool(index.get("unique"))
+
+async def index_report() -> dict:
+    """Compare existing indexes with REQUIRED_INDEXES: missing, redundant and unexpected ones"""
+    report = {}
+    for collection, indexes in REQUIRED_INDEXES.items():
+        existing = {}
+        async for index in db[collection].list_indexes():
+            if index["name"] != "_id_":
+                existing[index["name"]] = _index_spec(index)
+        required = {index.document["name"]: _index_spec(index.document) for index in indexes}
+        existing_specs = set(existing.values())
+        
+        # An index is redundant if it's a non-unique prefix of another index
+        redundant = [
+            name for name, (keys, unique) in existing.items()
+            if not unique and any(
+                other_name != name and len(other_keys) > len(keys) and other_keys[:len(keys)] == keys
+                for other_name, (other_keys, _) in existing.items()
+            )
+        ]
+        report[collection] = {
+            "missing": [name for name, spec in required.items() if spec not in existing_specs],
+            "redundant": redundant,
+            "unexpected": [name for name, spec in existing.items() if spec not in required.values()]
+        }
+    return report
+
+def _plan_stages(plan: dict):
+    yield plan.get("stage")
+    for child in plan.get("inputStages", []) + [plan.get("inputStage")]:
+        if child:
+            yield from _plan_stages(child)
+    if "queryPlan" in plan:
+        yield from _plan_stages(plan["queryPlan"])
+
+async def find_collection_scans() -> List[dict]:
+    """Explain each hot query and return those whose winning plan is a COLLSCAN"""
+    scans = []
+    for collection, query, sort in HOT_QUERIES:
+        command = {"find": collection, "filter": query}
+        if sort:
+            command["sort"] = sort
+        explain = await db.command({"explain": command, "verbosity": "queryPlanner"})
+        stages = set(_plan_stages(explain["queryPlanner"]["winningPlan"]))
+        if "COLLSCAN" in stages:
+            scans.append({"collection": collection, "filter": query, "sort": sort})
+    return scans
+
+@api_router.get("/admin/indexes")
+async def get_index_report(explain: bool = False):
+    """Index health: missing/redundant indexes and, with explain=true, hot queries that scan"""
+    result = {"collections": await index_report()}
+    if explain:
+        result["collection_scans"] = await find_collection_scans()
+    return result
+
+# ============ RESPONSE COMPRESSION ============
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+# Bodies on these paths only change with the question bank, so their compressed bytes are cached
+STATIC_PATHS = {"/api/domains", "/api/questions"}
+COMPRESSED_CACHE_TTL = 3600
+
+class ResponseCompressor:
+    """
+    Content-negotiated gzip/brotli encoder with a compressed-bytes cache for
+    static payloads, keyed by body digest so a changed body can never hit a
+    stale entry. Tracks bytes in/out and CPU time per encoding.
+    """
+
+    def __init__(self, minimum_size: int, cache_size: int):
+        self.minimum_size = minimum_size
+        self.encodings = ["br", "gzip"] if brotli else ["gzip"]
+        self.cache = TTLCache(cache_size, COMPRESSED_CACHE_TTL)
+        self.skipped = 0
+        self._totals = {e: {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0} for e in self.encodings}
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """Preferred supported encoding the client accepts (q > 0), or None"""
+        accepted = {}
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.partition(";")
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[name.strip()] = quality
+        for encoding in self.encodings:
+            if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                return encoding
+        return None
+
+    def _encode(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=BROTLI_QUALITY)
+        # Fixed mtime keeps the output deterministic for identical bodies
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+    def compress(self, body: bytes, encoding: str, cacheable: bool = False) -> bytes:
+        totals = self._totals[encoding]
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest()) if cacheable else None
+        compressed = self.cache.get(key) if key else None
+        if compressed is None:
+            start = time.thread_time()
+            compressed = self._encode(body, encoding)
+            totals["cpu_seconds"] += time.thread_time() - start
+            if key:
+                self.cache.set(key, compressed)
+        totals["responses"] += 1
+        totals["bytes_in"] += len(body)
+        totals["bytes_out"] += len(compressed)
+        return compressed
+
+    def stats(self) -> dict:
+        encodings = {}
+        for encoding, totals in self._totals.items():
+            encodings[encoding] = {
+                **totals,
+                "cpu_seconds": round(totals["cpu_seconds"], 4),
+                "ratio": round(totals["bytes_in"] / totals["bytes_out"], 2) if totals["bytes_out"] else 0.0,
+                "cpu_ms_per_mb": round(totals["cpu_seconds"] * 1000 / (totals["bytes_in"] / 1e6), 2) if totals["bytes_in"] else 0.0
+            }
+        return {"minimum_size": self.minimum_size, "skipped": self.skipped, "encodings": encodings, "cache": self.cache.stats()}
+
+compressor = ResponseCompressor(COMPRESSION_MIN_SIZE, COMPRESSION_CACHE_SIZE)
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing single-message JSON/text responses of at least
+    the compressor's minimum size. Streamed and already-encoded responses pass through.
+    """
+
+    def __init__(self, app, compressor: ResponseCompressor):
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self.compressor.negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        pending_start = None
+
+        async def send_compressed(message):
+            nonlocal pending_start
+            if message["type"] == "http.response.start":
+                pending_start = message
+                return
+            if pending_start is None:
+                await send(message)
+                return
+            start, pending_start = pending_start, None
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+            if (message.get("more_body") or "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                    or len(body) < self.compressor.minimum_size):
+                self.compressor.skipped += 1
+                await send(start)
+                await send(message)
+                return
+            body = self.compressor.compress(body, encoding, scope["path"] in STATIC_PATHS)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
 # ============ ROOT ROUTES ============
 
 @api_router.get("/")
@@ -1569,14 +3317,12 @@ async def root():
     return {"message": "SecPlus Study API", "version": "1.0.0"}
 
 @api_router.get("/domains")
-async def get_domains():
-    return [
-        {"id": 1, "name": "General Security Concepts", "weight": 12},
-        {"id": 2, "name": "Threats, Vulnerabilities & Mitigations", "weight": 22},
-        {"id": 3, "name": "Security Architecture", "weight": 18},
-        {"id": 4, "name": "Security Operations", "weight": 28},
-        {"id": 5, "name": "Security Program Management", "weight": 20}
-    ]
+async def get_domains(request: Request, response: Response):
+    etag = bank_etag(await get_question_bank())
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return [{**d, "exam_questions": EXAM_BLUEPRINT[d["id"]]} for d in DOMAINS]
 
 app.include_router(api_router)
 
@@ -1586,8 +3332,48 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+app.add_middleware(CompressionMiddleware, compressor=compressor)
+
+@app.on_event("startup")
+async def provision_indexes():
+    try:
+        await ensure_indexes()
+        report = await index_report()
+        for collection, indexes in report.items():
+            if indexes["missing"] or indexes["redundant"]:
+                logger.warning(f"Indexes on {collection}: {indexes}")
+    except Exception as e:
+        logger.error(f"Index provisioning failed: {e}")
+
+@app.on_event("startup")
+async def prepare_session_history():
+    try:
+        await migrate_legacy_history()
+        if HISTORY_ROLLUP_DAYS > 0:
+            await rollup_sessions(HISTORY_ROLLUP_DAYS)
+    except Exception as e:
+        logger.error(f"Session history startup tasks failed: {e}")
+
+@app.on_event("startup")
+async def warm_question_bank():
+    try:
+        await question_bank.reload()
+    except Exception as e:
+        # Leave the bank unloaded; the first request will retry the load
+        logger.error(f"Question bank warm-up failed: {e}")
+    exam_pool.start()
+    invalidation_bus.start()
+    try:
+        await backfill_card_domains()
+        await backfill_question_fingerprints()
+    except Exception as e:
+        logger.error(f"Startup backfill failed: {e}")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await exam_pool.stop()
+    await invalidation_bus.stop()
     client.close()
+    password_executor.shutdown(wait=False)
@@ -33,7 +33,7 @@ const Exam = () => {
   const startExam = async () => {
     setLoading(true);
     try {
-      const response = await axios.get(`${API}/questions/exam`);
+      const response = await axios.get(`${API}/questions/exam`, { params: { lean: true } });
       setQuestions(response.data);
       setStarted(true);
       startTimer();
@@ -104,11 +104,36 @@ const Exam = () => {
         mode: 'exam',
         total_time: (90 * 60) - timeLeft
       };
-      await axios.post(`${API}/progress/submit`, submission);
-      navigate('/results', { state: { answers: Object.entries(answers).map(([qId, ans]) => ({ question_id: qId, selected_answer: ans })), questions, mode: 'exam' } });
+      // Lean delivery withholds answers, so review the graded questions the server sends back
+      const response = await axios.post(`${API}/progress/submit`, submission);
+      const graded = response.data.results.map(r => ({
+        id: r.question_id,
+        domain: r.domain,
+        domain_name: r.domain_name,
+        question: r.question,
+        options: r.options,
+        correct_answer: r.correct_answer,
+        explanation: r.explanation
+      }));
+      navigate('/results', { state: { answers: Object.entries(answers).map(([qId, ans]) => ({ question_id: qId, selected_answer: ans })), questions: graded, mode: 'exam' } });
     } catch (error) {
       console.error('Failed to submit:', error);
-      navigate('/results', { state: { answers: Object.entries(answers).map(([qId, ans]) => ({ question_id: qId, selected_answer: ans })), questions, mode: 'exam' } });
+      // Grading failed, so fetch the withheld answers to review the exam locally
+      try {
+        const response = await axios.post(`${API}/questions/explanations`, { question_ids: questions.map(q => q.id) });
+        const answerKey = Object.fromEntries(response.data.map(a => [a.question_id, a]));
+        const reviewed = questions.map(q => ({
+          ...q,
+          correct_answer: answerKey[q.id]?.correct_answer,
+          explanation: answerKey[q.id]?.explanation
+        }));
+        navigate('/results', { state: { answers: Object.entries(answers).map(([qId, ans]) => ({ question_id: qId, selected_answer: ans })), questions: reviewed, mode: 'exam' } });
+      } catch (lookupError) {
+        console.error('Failed to fetch answers:', lookupError);
+        alert('Your exam could not be submitted. Check your connection and try again.');
+        // Let the user retry from the exam; a timed-out exam stays stopped
+        if (timeLeft > 0) startTimer();
+      }
     }
   };
 
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { motion, AnimatePresence } from 'framer-motion';
@@ -7,11 +7,15 @@ import { Button } from '../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Progress } from '../components/ui/progress';
 import { Badge } from '../components/ui/badge';
+import { useAuth } from '../context/AuthContext';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+const REVIEW_QUEUE_KEY = 'smartReviewQueue';
+const REVIEW_FLUSH_EVERY = 5;
 
 const SmartReview = () => {
   const navigate = useNavigate();
+  const { user } = useAuth();
   const [stats, setStats] = useState(null);
   const [questions, setQuestions] = useState([]);
   const [currentIndex, setCurrentIndex] = useState(0);
@@ -20,9 +24,91 @@ const SmartReview = () => {
   const [loading, setLoading] = useState(true);
   const [started, setStarted] = useState(false);
   const [sessionStats, setSessionStats] = useState({ reviewed: 0, correct: 0 });
+  // Reviews are queued in localStorage, so a reload or crash can't lose them, and
+  // sent in batches every few cards, at the end of the session and on pagehide.
+  // A batch leaves the queue only once the server accepts it; the server ignores
+  // reviews it has already applied, so resending after an unconfirmed send is safe.
+  // The queue is per user, so reviews left behind by one account are never sent
+  // with another account's token.
+  const flushing = useRef(false);
+  const queueKey = `${REVIEW_QUEUE_KEY}:${user.id}`;
+
+  const loadQueue = () => {
+    try {
+      return JSON.parse(localStorage.getItem(queueKey)) || [];
+    } catch (error) {
+      return [];
+    }
+  };
+
+  const saveQueue = (reviews) => {
+    localStorage.setItem(queueKey, JSON.stringify(reviews));
+  };
+
+  // A review is identified by its card and time, so removing a batch that was sent
+  // twice (pagehide and unmount) or alongside new reviews never drops unsent ones
+  const reviewKey = (review) => `${review.question_id}|${review.reviewed_at}`;
+
+  const dequeue = (sent) => {
+    const sentKeys = new Set(sent.map(reviewKey));
+    saveQueue(loadQueue().filter(review => !sentKeys.has(reviewKey(review))));
+  };
+
+  const flushReviews = async () => {
+    if (flushing.current) return;
+    const reviews = loadQueue();
+    if (reviews.length === 0) return;
+    flushing.current = true;
+    try {
+      await axios.post(`${API}/spaced-repetition/review/batch`, { reviews });
+      dequeue(reviews);
+    } catch (error) {
+      console.error('Failed to submit reviews:', error);
+    } finally {
+      flushing.current = false;
+    }
+  };
+
+  const queueReview = (questionId, quality) => {
+    const reviews = [...loadQueue(), {
+      question_id: questionId,
+      quality,
+      reviewed_at: new Date().toISOString()
+    }];
+    saveQueue(reviews);
+    if (reviews.length >= REVIEW_FLUSH_EVERY) {
+      flushReviews();
+    }
+  };
 
   useEffect(() => {
     fetchStats();
+    // Send anything left over from an earlier session that didn't get to flush
+    flushReviews();
+
+    // keepalive lets the request outlive the page when the tab is closed or reloaded
+    const flushOnPageHide = () => {
+      const reviews = loadQueue();
+      if (reviews.length === 0) return;
+      fetch(`${API}/spaced-repetition/review/batch`, {
+        method: 'POST',
+        keepalive: true,
+        headers: {
+          'Content-Type': 'application/json',
+          Authorization: axios.defaults.headers.common['Authorization']
+        },
+        body: JSON.stringify({ reviews })
+      }).then(response => {
+        if (response.ok) dequeue(reviews);
+      }).catch(error => console.error('Failed to submit reviews:', error));
+    };
+    window.addEventListener('pagehide', flushOnPageHide);
+
+    // Flush anything still queued when leaving the page mid-session
+    return () => {
+      window.removeEventListener('pagehide', flushOnPageHide);
+      flushReviews();
+    };
   }, []);
 
   const fetchStats = async () => {
@@ -67,15 +153,7 @@ const SmartReview = () => {
     // Quality rating: 0-2 = fail, 3-5 = pass
     // We'll use: wrong = 1, correct = 4, easy = 5
     const quality = isCorrect ? 4 : 1;
-    
-    try {
-      await axios.post(`${API}/spaced-repetition/review`, {
-        question_id: currentQuestion.id,
-        quality
-      });
-    } catch (error) {
-      console.error('Failed to submit review:', error);
-    }
+    queueReview(currentQuestion.id, quality);
     
     setSessionStats(prev => ({
       reviewed: prev.reviewed + 1,
@@ -87,26 +165,18 @@ const SmartReview = () => {
 
   const handleRateAndNext = async (quality) => {
     const currentQuestion = questions[currentIndex];
-    
-    try {
-      await axios.post(`${API}/spaced-repetition/review`, {
-        question_id: currentQuestion.id,
-        quality
-      });
-    } catch (error) {
-      console.error('Failed to submit rating:', error);
-    }
-    
+    queueReview(currentQuestion.id, quality);
     handleNext();
   };
 
-  const handleNext = () => {
+  const handleNext = async () => {
     if (currentIndex < questions.length - 1) {
       setCurrentIndex(prev => prev + 1);
       setSelectedAnswer(null);
       setShowResult(false);
     } else {
       // Session complete
+      await flushReviews();
       navigate('/dashboard');
     }
   };
@@ -0,0 +1,65 @@
+"""
+Shared fixtures for the backend tests.
+
+Tests run against a throwaway database on the MongoDB at TEST_MONGO_URL
+(default mongodb://localhost:27017), never the one configured in backend/.env.
+They are skipped when that server is unreachable.
+"""
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Set before server is imported; load_dotenv does not override existing variables
+os.environ["MONGO_URL"] = os.environ.get("TEST_MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = f"secplus_test_{uuid.uuid4().hex[:12]}"
+os.environ.setdefault("JWT_SECRET", "test-secret")
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from pymongo.errors import PyMongoError  # noqa: E402
+
+import server  # noqa: E402
+
+def mongo_available() -> bool:
+    async def ping():
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=2000)
+        try:
+            await client.admin.command("ping")
+            return True
+        except PyMongoError:
+            return False
+        finally:
+            client.close()
+    return asyncio.run(ping())
+
+@pytest.fixture(scope="session")
+def mongo_url():
+    if not mongo_available():
+        pytest.skip(f"MongoDB not reachable at {os.environ['MONGO_URL']}")
+    return os.environ["MONGO_URL"]
+
+@pytest.fixture
+def run_db(mongo_url):
+    """
+    Run `coro_fn()` in a fresh event loop with server.db pointed at a new
+    throwaway database, which is dropped afterwards.
+    """
+    def run(coro_fn):
+        async def main():
+            client = AsyncIOMotorClient(mongo_url)
+            name = f"{os.environ['DB_NAME']}_{uuid.uuid4().hex[:6]}"
+            server.client, server.db = client, client[name]
+            server.question_bank.__init__()
+            try:
+                return await coro_fn()
+            finally:
+                await client.drop_database(name)
+                client.close()
+        return asyncio.run(main())
+    return run
@@ -0,0 +1,48 @@
+import types
+
+import server
+
+USER_ID = "due-queue-user"
+
+class ReviewDuringLoad:
+    """Card collection whose first load returns only after a review has been written"""
+
+    def __init__(self, cards, on_load):
+        self.cards = cards
+        self.on_load = on_load
+
+    def find(self, *args, **kwargs):
+        cursor = self.cards.find(*args, **kwargs)
+        collection = self
+
+        class Cursor:
+            async def to_list(self, length):
+                result = await cursor.to_list(length)
+                on_load, collection.on_load = collection.on_load, None
+                if on_load:
+                    await on_load()
+                return result
+        return Cursor()
+
+def test_review_during_load_is_not_lost(run_db):
+    cache = server.DueQueueCache(max_cards=1000, ttl=300)
+    due = {"user_id": USER_ID, "question_id": "q1", "next_review": "2024-01-01"}
+    reviewed = {**due, "next_review": "2099-01-01"}
+    
+    async def check():
+        cards = server.db.spaced_repetition
+        await cards.insert_one(dict(due))
+        
+        async def review():
+            await cards.replace_one({"user_id": USER_ID, "question_id": "q1"}, reviewed)
+            cache.update(USER_ID, reviewed)
+        
+        real_db = server.db
+        server.db = types.SimpleNamespace(spaced_repetition=ReviewDuringLoad(cards, review))
+        try:
+            queue = await cache.get(USER_ID)
+        finally:
+            server.db = real_db
+        return queue.due("2030-01-01", 10)
+    
+    assert run_db(check) == []
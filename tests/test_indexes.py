@@ -0,0 +1,16 @@
+import server
+
+def test_required_indexes_are_created(run_db):
+    async def check():
+        failed = await server.ensure_indexes()
+        return failed, await server.index_report()
+    failed, report = run_db(check)
+    assert failed == {}
+    for collection, indexes in report.items():
+        assert indexes["missing"] == [], collection
+
+def test_hot_queries_do_not_scan_collections(run_db):
+    async def check():
+        await server.ensure_indexes()
+        return await server.find_collection_scans()
+    assert run_db(check) == []
@@ -0,0 +1,110 @@
+"""
+Multi-process convergence of the invalidation bus: separate worker processes, each
+with its own in-process caches, must pick up writes published by another process
+within a bounded delay.
+"""
+import asyncio
+import multiprocessing
+import os
+import queue
+import time
+import uuid
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import server
+
+WORKERS = 3
+POLL_INTERVAL = 0.2
+BOUND = 2 * POLL_INTERVAL + 1.0  # one poll interval, plus a bank reload and scheduling slack
+USER_ID = "invalidation-test-user"
+
+def _worker(db_name, reports, stop):
+    asyncio.run(_watch_caches(db_name, reports, stop))
+
+async def _watch_caches(db_name, reports, stop):
+    """Report (revision, user cached, due queue cached) whenever this worker's caches change"""
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    server.client, server.db = client, client[db_name]
+    server.invalidation_bus.poll_interval = POLL_INTERVAL
+    server.invalidation_bus.user_events = True
+    await server.question_bank.reload()
+    server.user_cache.set(USER_ID, {"id": USER_ID})
+    await server.due_queues.get(USER_ID)
+    server.invalidation_bus.start()
+    
+    def state():
+        return (server.question_bank.revision,
+                server.user_cache.get(USER_ID) is not None,
+                server.due_queues.stats()["users"] > 0)
+    
+    last = state()
+    reports.put(("ready", last))
+    try:
+        while not stop.is_set():
+            current = state()
+            if current != last:
+                last = current
+                reports.put(("state", current))
+            await asyncio.sleep(0.005)
+    finally:
+        await server.invalidation_bus.stop()
+        client.close()
+
+async def _wait_for(reports, expected, workers, timeout):
+    """Seconds until `workers` processes report `expected`, or None on timeout"""
+    start = time.monotonic()
+    converged = 0
+    while converged < workers:
+        remaining = timeout - (time.monotonic() - start)
+        try:
+            _, current = await asyncio.to_thread(reports.get, True, max(0.0, remaining))
+        except queue.Empty:
+            return None
+        if current == expected:
+            converged += 1
+    return time.monotonic() - start
+
+def test_workers_converge_after_writes(mongo_url):
+    db_name = f"{os.environ['DB_NAME']}_{uuid.uuid4().hex[:6]}"
+    ctx = multiprocessing.get_context("spawn")
+    reports, stop = ctx.Queue(), ctx.Event()
+    processes = [ctx.Process(target=_worker, args=(db_name, reports, stop)) for _ in range(WORKERS)]
+    
+    async def publish_and_measure():
+        client = AsyncIOMotorClient(mongo_url)
+        server.client, server.db = client, client[db_name]
+        server.invalidation_bus.poll_interval = POLL_INTERVAL
+        server.invalidation_bus.user_events = True
+        try:
+            ready = await _wait_for(reports, (0, True, True), WORKERS, timeout=60)
+            assert ready is not None, "worker processes did not start"
+            
+            revision = await server.bump_bank_version()
+            bank_lag = await _wait_for(reports, (revision, True, True), WORKERS, BOUND)
+            
+            # A due queue event must leave the cached user alone
+            await server.invalidation_bus.publish(server.DUE_QUEUE_EVENT, USER_ID)
+            due_lag = await _wait_for(reports, (revision, True, False), WORKERS, BOUND)
+            
+            await server.invalidation_bus.publish(server.USER_EVENT, USER_ID)
+            user_lag = await _wait_for(reports, (revision, False, False), WORKERS, BOUND)
+            return bank_lag, due_lag, user_lag
+        finally:
+            await client.drop_database(db_name)
+            client.close()
+    
+    for process in processes:
+        process.start()
+    try:
+        bank_lag, due_lag, user_lag = asyncio.run(publish_and_measure())
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+    
+    assert bank_lag is not None, f"question banks did not converge within {BOUND}s"
+    assert due_lag is not None, f"due queues were not invalidated within {BOUND}s"
+    assert user_lag is not None, f"user caches were not invalidated within {BOUND}s"
@@ -0,0 +1,29 @@
+import server
+
+USER_ID = "new-cards-user"
+QUESTION_IDS = [f"q{i:02d}" for i in range(10)]
+
+async def seed_bank(cursor: str):
+    await server.db.questions.insert_many([{"id": qid, "domain": "1.0"} for qid in QUESTION_IDS])
+    await server.db.progress.insert_one({"user_id": USER_ID, "new_card_cursor": cursor})
+
+def test_wrapped_scan_does_not_repeat_cards(run_db):
+    # Everything up to the cursor is reviewed, plus two cards past it:
+    # only q06 and q09 are new, and wrapping must not pick them again
+    known = {qid: {} for qid in ["q00", "q01", "q02", "q03", "q04", "q05", "q07", "q08"]}
+    
+    async def check():
+        await seed_bank("q05")
+        return await server.pick_new_cards(USER_ID, 4, known_cards=known)
+    
+    assert [q["id"] for q in run_db(check)] == ["q06", "q09"]
+
+def test_wrapped_scan_finds_cards_below_the_cursor(run_db):
+    # q00 was added after the user moved past it
+    known = {qid: {} for qid in ["q01", "q02", "q03", "q04", "q05", "q07", "q08"]}
+    
+    async def check():
+        await seed_bank("q05")
+        return await server.pick_new_cards(USER_ID, 4, known_cards=known)
+    
+    assert [q["id"] for q in run_db(check)] == ["q06", "q09", "q00"]
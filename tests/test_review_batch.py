@@ -0,0 +1,30 @@
+import server
+
+USER = {"id": "review-batch-user"}
+
+def batch(*reviews):
+    return server.ReviewBatchSubmit(reviews=[server.ReviewBatchItem(**review) for review in reviews])
+
+def test_repeated_reviews_in_one_batch_chain(run_db):
+    async def check():
+        return await server.submit_review_batch(
+            batch({"question_id": "q1", "quality": 5}, {"question_id": "q1", "quality": 5}), USER
+        )
+    result = run_db(check)
+    assert (result["reviewed"], result["replayed"]) == (2, 0)
+    assert result["cards"][0]["repetitions"] == 2
+
+def test_resent_batch_is_not_applied_twice(run_db):
+    reviews = (
+        {"question_id": "q1", "quality": 4, "reviewed_at": "2024-01-01T10:00:00+00:00"},
+        {"question_id": "q1", "quality": 4, "reviewed_at": "2024-01-01T10:05:00+00:00"},
+    )
+    
+    async def check():
+        first = await server.submit_review_batch(batch(*reviews), USER)
+        second = await server.submit_review_batch(batch(*reviews), USER)
+        return first, second
+    first, second = run_db(check)
+    assert (first["reviewed"], first["replayed"]) == (2, 0)
+    assert (second["reviewed"], second["replayed"]) == (0, 2)
+    assert second["cards"] == first["cards"]
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import server
+
+def batch_of_one(quality, repetitions, ease_factor, interval):
+    new_repetitions, new_ease_factor, new_interval = server.calculate_sm2_batch(
+        [quality], [repetitions], [ease_factor], [interval]
+    )
+    return int(new_repetitions[0]), float(new_ease_factor[0]), int(new_interval[0])
+
+@pytest.mark.parametrize("quality, repetitions, ease_factor, interval, expected", [
+    # Failing resets repetitions and the interval, and lowers ease down to 1.3
+    (0, 4, 2.5, 30, (0, 2.3, 1)),
+    (2, 4, 1.4, 30, (0, 1.3, 1)),
+    # Passing: fixed first two intervals, then interval * ease
+    (3, 0, 2.5, 0, (1, 2.36, 1)),
+    (4, 1, 2.5, 1, (2, 2.5, 3)),
+    (5, 2, 2.5, 6, (3, 2.6, 15)),
+    (3, 5, 1.3, 10, (6, 1.3, 13)),
+    # Halves round to even, as Python's round() does
+    (4, 2, 2.5, 5, (3, 2.5, 12)),
+    (4, 2, 2.5, 3, (3, 2.5, 8)),
+])
+def test_scalar_and_batch_agree_on_each_branch(quality, repetitions, ease_factor, interval, expected):
+    for result in (server.calculate_sm2(quality, repetitions, ease_factor, interval),
+                   batch_of_one(quality, repetitions, ease_factor, interval)):
+        assert result[0] == expected[0]
+        assert result[1] == pytest.approx(expected[1])
+        assert result[2] == expected[2]
+
+def test_batch_matches_scalar_on_random_cards():
+    rng = np.random.default_rng(0)
+    cards = 20_000
+    quality = rng.integers(0, 6, cards)
+    repetitions = rng.integers(0, 10, cards)
+    ease_factor = rng.uniform(1.3, 3.0, cards)
+    interval = rng.integers(0, 200, cards)
+    # Include exact halves, where rounding is easiest to get wrong
+    ease_factor[::10] = 2.5
+    interval[::10] = rng.integers(0, 100, len(interval[::10])) * 2 + 1
+    
+    new_repetitions, new_ease_factor, new_interval = server.calculate_sm2_batch(
+        quality, repetitions, ease_factor, interval
+    )
+    for k in range(cards):
+        expected = server.calculate_sm2(int(quality[k]), int(repetitions[k]), float(ease_factor[k]), int(interval[k]))
+        assert (int(new_repetitions[k]), int(new_interval[k])) == (expected[0], expected[2]), k
+        assert float(new_ease_factor[k]) == pytest.approx(expected[1], abs=1e-9), k